@@ -0,0 +1,54 @@
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from threading import Lock
+from models import User, Clip, Comment
+from schemas import UserRole
+import os
+import time
+
+ADMIN_STATS_TTL = float(os.getenv("ADMIN_STATS_TTL", "30"))
+
+def compute_admin_stats(db: Session) -> dict:
+    """Every admin panel counter from one aggregate pass over users plus two table counts."""
+    row = db.execute(
+        select(
+            func.count(User.id),
+            func.count(case((User.approved == False, 1))),
+            func.count(case((User.role == UserRole.ADMIN, 1))),
+            func.count(case((User.role == UserRole.MODERATOR, 1))),
+            select(func.count(Clip.id)).scalar_subquery(),
+            select(func.count(Comment.id)).scalar_subquery(),
+        ).select_from(User)
+    ).one()
+    total_users, pending_users, admins, moderators, total_videos, total_comments = row
+
+    return {
+        "total_users": total_users,
+        "pending_approvals": pending_users,
+        "approved_users": total_users - pending_users,
+        "total_videos": total_videos,
+        "total_comments": total_comments,
+        "admins": admins,
+        "moderators": moderators
+    }
+
+class AdminStatsCache:
+    """
+    Serves the stats from memory for up to ttl seconds, so panel loads don't rescan the tables.
+    Each uvicorn worker keeps its own copy, so every counter may lag by up to ttl.
+    """
+
+    def __init__(self, ttl: float = ADMIN_STATS_TTL):
+        self.ttl = ttl
+        self.stats = None
+        self.computed_at = 0.0
+        self._lock = Lock()
+
+    def get(self, db: Session) -> dict:
+        with self._lock:
+            if self.stats is None or time.monotonic() - self.computed_at > self.ttl:
+                self.stats = compute_admin_stats(db)
+                self.computed_at = time.monotonic()
+            return self.stats
+
+admin_stats_cache = AdminStatsCache()
@@ -0,0 +1,60 @@
+"""
+One-off maintenance commands for clips uploaded before a processing step existed:
+
+    python backfill.py faststart
+    python backfill.py metadata
+"""
+import argparse
+from database import SessionLocal
+from models import Clip
+from job_queue import enqueue_job
+
+def backfill_faststart(db) -> int:
+    # One job per blob: the handler updates every clip that shares the file
+    clips = db.query(Clip).filter(
+        Clip.faststart_remuxed == False,
+        Clip.file_path.ilike("%.mp4")
+    ).order_by(Clip.id).all()
+
+    queued_paths = set()
+    for clip in clips:
+        if clip.file_path in queued_paths:
+            continue
+        enqueue_job(db, "faststart", clip.id, {"video_path": clip.file_path})
+        queued_paths.add(clip.file_path)
+
+    db.commit()
+    return len(queued_paths)
+
+def backfill_metadata(db) -> int:
+    clips = db.query(Clip).filter(Clip.width == None).order_by(Clip.id).all()
+
+    queued_paths = set()
+    for clip in clips:
+        if clip.file_path in queued_paths:
+            continue
+        enqueue_job(db, "metadata", clip.id, {"video_path": clip.file_path})
+        queued_paths.add(clip.file_path)
+
+    db.commit()
+    return len(queued_paths)
+
+COMMANDS = {
+    "faststart": backfill_faststart,
+    "metadata": backfill_metadata,
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Queue processing jobs for existing clips")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        queued = COMMANDS[args.command](db)
+        print(f"✓ Queued {queued} {args.command} job(s); run `python worker.py` to process them")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
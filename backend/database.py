@@ -1,24 +1,102 @@
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from starlette.datastructures import MutableHeaders
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional read-only replica for GET requests; everything reads from the primary when unset
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# Per process: with 4 uvicorn workers plus the job worker, keep (size + overflow) * processes
+# under the server's max_connections
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT = int(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+# Reconnect before proxies or the server drop idle connections
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+# Server-side limit on any one statement; 0 disables it
+DATABASE_STATEMENT_TIMEOUT_MS = int(os.getenv("DATABASE_STATEMENT_TIMEOUT_MS", "30000"))
+# How long a client reads from the primary after a write, to cover replication lag
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv("DATABASE_REPLICA_STICKY_SECONDS", "10"))
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+PRIMARY_READS_COOKIE = "read_primary"
+
+def create_db_engine(url: str, read_only: bool = False):
+    """Engine with pooling suited to the backend; SQLite is a local file and needs none of it."""
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    connect_args = {}
+    if url.startswith("postgresql"):
+        options = []
+        if DATABASE_STATEMENT_TIMEOUT_MS:
+            options.append(f"-c statement_timeout={DATABASE_STATEMENT_TIMEOUT_MS}")
+        if read_only:
+            # A write routed here by mistake fails instead of going to a server that may be promoted later
+            options.append("-c default_transaction_read_only=on")
+        if options:
+            connect_args["options"] = " ".join(options)
+
+    return create_engine(
+        url,
+        pool_size=DATABASE_POOL_SIZE,
+        max_overflow=DATABASE_MAX_OVERFLOW,
+        pool_timeout=DATABASE_POOL_TIMEOUT,
+        pool_recycle=DATABASE_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=connect_args
+    )
+
+engine = create_db_engine(DATABASE_URL)
+replica_engine = create_db_engine(DATABASE_REPLICA_URL, read_only=True) if DATABASE_REPLICA_URL else None
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine or engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+def reads_from_replica(request: Request) -> bool:
+    return (
+        replica_engine is not None
+        and request.method in READ_METHODS
+        and PRIMARY_READS_COOKIE not in request.cookies
+    )
+
+def get_db(request: Request):
+    # GET requests read from the replica unless this client wrote something moments ago
+    db = ReplicaSessionLocal() if reads_from_replica(request) else SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+class ReadYourWritesMiddleware:
+    """
+    Marks clients that just sent a write so their next reads go to the primary, where the write is
+    already visible. A cookie rather than process state, so every uvicorn worker sees it.
+    """
+
+    def __init__(self, app, secure: bool = False, domain: str | None = None):
+        self.app = app
+        cookie = f"{PRIMARY_READS_COOKIE}=1; Max-Age={DATABASE_REPLICA_STICKY_SECONDS}; Path=/; HttpOnly"
+        cookie += "; SameSite=none; Secure" if secure else "; SameSite=lax"
+        if domain:
+            cookie += f"; Domain={domain}"
+        self.cookie = cookie
+
+    async def __call__(self, scope, receive, send):
+        if replica_engine is None or scope["type"] != "http" or scope["method"] in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("set-cookie", self.cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,246 @@
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import quote
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from schemas import ProcessingStatus
+from ingest_service import UPLOAD_DIR
+from auth import SECRET_KEY
+from media_cache import media_cache
+from stream_pacing import STREAM_PACING, stream_pacer, file_chunks, paced_rate
+import base64
+import hashlib
+import hmac
+import os
+import re
+import time
+
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", str(365 * 24 * 3600)))
+# Opt-in delivery through the front proxy: "x-accel-redirect" (nginx) or "x-sendfile" (Apache, lighttpd, Caddy)
+MEDIA_OFFLOAD = os.getenv("MEDIA_OFFLOAD", "").lower()
+# Internal nginx location aliased to the uploads directory, see nginx.offload.conf
+MEDIA_OFFLOAD_PREFIX = os.getenv("MEDIA_OFFLOAD_PREFIX", "/internal-media/")
+# Signed playback URLs live PLAYBACK_URL_TTL seconds or up to one bucket longer: expiry is rounded
+# up to the bucket so every link issued for a clip within a bucket is the same, cacheable URL.
+PLAYBACK_URL_TTL = int(os.getenv("PLAYBACK_URL_TTL", str(6 * 3600)))
+PLAYBACK_URL_BUCKET = int(os.getenv("PLAYBACK_URL_BUCKET", "3600"))
+PLAYBACK_SIGNING_KEY = hmac.new(SECRET_KEY.encode(), b"clip-playback", hashlib.sha256).digest()
+SINGLE_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Headers a 304 must repeat from the full response (RFC 9110 section 15.4.5)
+NOT_MODIFIED_HEADERS = ("cache-control", "etag", "expires", "vary", "content-location")
+
+def video_media_type(file_path: str) -> str:
+    return "video/webm" if file_path.lower().endswith(".webm") else "video/mp4"
+
+def media_cache_control(clip, final: bool | None = None) -> str:
+    """
+    Public clips are cached by browsers and proxies; private ones only by the viewer's browser,
+    which revalidates so a revoked viewer gets a 403 instead of a cached copy. The blob is only
+    final once processing is done (the faststart job rewrites it in place), so until then even
+    public clips must be revalidated. Derived files are swapped in complete and pass final=True.
+    """
+    if final is None:
+        final = clip.processing_status != ProcessingStatus.PENDING
+    return cache_control(clip.private, final)
+
+def cache_control(private: bool, final: bool) -> str:
+    if private:
+        return "private, no-cache"
+    if not final:
+        return "public, no-cache"
+    return f"public, max-age={MEDIA_CACHE_MAX_AGE}, immutable"
+
+def file_etag(stat_result: os.stat_result) -> str:
+    # Same format nginx uses for static files, so validators stay valid whether the app or the
+    # proxy served the bytes. Blobs are replaced, never modified in place.
+    return f'"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"'
+
+def is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def offload_headers(path: str | Path) -> dict | None:
+    """Internal redirect telling the front proxy to send the file itself, or None to serve it from Python."""
+    if MEDIA_OFFLOAD == "x-sendfile":
+        return {"X-Sendfile": os.path.abspath(path)}
+    if MEDIA_OFFLOAD == "x-accel-redirect":
+        relative_path = os.path.relpath(os.path.abspath(path), os.path.abspath(UPLOAD_DIR))
+        if relative_path.startswith(".."):
+            return None
+        return {"X-Accel-Redirect": MEDIA_OFFLOAD_PREFIX + quote(Path(relative_path).as_posix())}
+    return None
+
+def parse_byte_range(range_header: str, file_size: int) -> tuple[int, int] | None:
+    """(start, end) inclusive for a single satisfiable range; anything else is left to FileResponse."""
+    match = SINGLE_RANGE_PATTERN.match(range_header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    if match.group(1) == "":
+        start, end = max(0, file_size - int(match.group(2))), file_size - 1
+    else:
+        start = int(match.group(1))
+        end = min(int(match.group(2)), file_size - 1) if match.group(2) else file_size - 1
+    if start > end or start >= file_size:
+        return None
+    return start, end
+
+def requested_byte_range(request: Request, file_size: int, headers: dict) -> tuple[int, int, int, dict] | None:
+    """(start, end, status code, headers) for a whole-file or single-range GET; None leaves it to FileResponse."""
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range in (headers["ETag"], headers["Last-Modified"])):
+        byte_range = parse_byte_range(range_header, file_size)
+        if byte_range is None:
+            return None
+        start, end = byte_range
+        return start, end, 206, {**headers, "Content-Range": f"bytes {start}-{end}/{file_size}", "Accept-Ranges": "bytes"}
+    if file_size:
+        return 0, file_size - 1, 200, {**headers, "Accept-Ranges": "bytes"}
+    return None
+
+def cached_media_response(request: Request, path: str | Path, stat_result: os.stat_result, media_type: str,
+                          headers: dict) -> Response | None:
+    """Answer from the hot-clip cache when the start of the requested bytes is in memory, otherwise None."""
+    byte_range = requested_byte_range(request, stat_result.st_size, headers)
+    if byte_range is None:
+        return None
+    start, end, status_code, headers = byte_range
+
+    # Players ask for open-ended ranges (bytes=0-, bytes=N-), which run past the cached prefix of
+    # most clips; the cached part is sent first and the rest streams from disk
+    data = media_cache.read(path, stat_result, start, end, partial=True)
+    if data is None:
+        return None
+    if len(data) == end - start + 1:
+        return Response(data, status_code=status_code, media_type=media_type, headers=headers)
+    return StreamingResponse(
+        file_chunks(path, start, end, data),
+        status_code=status_code,
+        media_type=media_type,
+        headers={**headers, "Content-Length": str(end - start + 1)}
+    )
+
+def paced_media_response(request: Request, path: str | Path, stat_result: os.stat_result, media_type: str,
+                         headers: dict, pacing_key: str, bitrate: int | None) -> Response | None:
+    byte_range = requested_byte_range(request, stat_result.st_size, headers)
+    if byte_range is None:
+        return None
+    start, end, status_code, headers = byte_range
+
+    # Bursts of viewers are what pacing is for, and the leading bytes they all fetch are usually cached
+    cached = media_cache.read(path, stat_result, start, end, partial=True) or b""
+    stream = stream_pacer.open(pacing_key, bitrate)
+    return StreamingResponse(
+        file_chunks(path, start, end, cached, stream),
+        status_code=status_code,
+        media_type=media_type,
+        headers={**headers, "Content-Length": str(end - start + 1)}
+    )
+
+def serve_media_file(request: Request, path: str | Path, media_type: str, cache_control: str,
+                     pacing_key: str | None = None, bitrate: int | None = None) -> Response:
+    """
+    FileResponse with strong validators that answers conditional requests with 304. With
+    MEDIA_OFFLOAD set, only the headers are produced here and the proxy streams the body and
+    handles ranges, so a slow download never holds a worker. Passing pacing_key (the viewer)
+    opts the response into STREAM_PACING.
+    """
+    stat_result = os.stat(path)
+    etag = file_etag(stat_result)
+    headers = {
+        "Cache-Control": cache_control,
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+    }
+    paced = STREAM_PACING and pacing_key is not None
+
+    if is_not_modified(request, etag, stat_result.st_mtime):
+        return Response(
+            status_code=304,
+            headers={name: value for name, value in headers.items() if name.lower() in NOT_MODIFIED_HEADERS}
+        )
+
+    redirect_headers = offload_headers(path)
+    if redirect_headers:
+        if paced and MEDIA_OFFLOAD == "x-accel-redirect" and paced_rate(bitrate):
+            # nginx can only limit each response on its own; there is no fair share across streams
+            redirect_headers["X-Accel-Limit-Rate"] = str(paced_rate(bitrate))
+        return Response(media_type=media_type, headers={**headers, **redirect_headers})
+
+    if paced:
+        paced_response = paced_media_response(request, path, stat_result, media_type, headers, pacing_key, bitrate)
+        if paced_response:
+            return paced_response
+
+    cached_response = cached_media_response(request, path, stat_result, media_type, headers)
+    if cached_response:
+        return cached_response
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+class PlaybackGrant:
+    """What a verified playback token allows: one clip's blob and its derived media, until expires."""
+
+    def __init__(self, clip_id: int, file_path: str, private: bool, final: bool, expires: int, bitrate: int | None):
+        self.clip_id = clip_id
+        self.file_path = file_path
+        self.private = private
+        self.final = final
+        self.expires = expires
+        self.bitrate = bitrate
+
+    def cache_control(self, final: bool | None = None) -> str:
+        return cache_control(self.private, self.final if final is None else final)
+
+def b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def sign_playback(payload: str) -> str:
+    return b64encode(hmac.new(PLAYBACK_SIGNING_KEY, payload.encode(), hashlib.sha256).digest()[:16])
+
+def playback_expiry(now: float | None = None) -> int:
+    now = time.time() if now is None else now
+    return int(-(-(now + PLAYBACK_URL_TTL) // PLAYBACK_URL_BUCKET) * PLAYBACK_URL_BUCKET)
+
+def playback_token(clip) -> str:
+    """
+    Sign everything the streaming routes need, so they can serve ranges without a database
+    round trip. The caller must already have checked that the viewer may see the clip.
+    """
+    flags = ("p" if clip.private else "") + ("f" if clip.processing_status != ProcessingStatus.PENDING else "")
+    payload = f"{clip.id}|{playback_expiry()}|{flags}|{clip.bitrate or ''}|{clip.file_path}"
+    return f"{b64encode(payload.encode())}.{sign_playback(payload)}"
+
+def clip_playback_url(clip) -> str:
+    return f"/api/play/{playback_token(clip)}/video"
+
+def verify_playback_token(token: str) -> PlaybackGrant:
+    invalid = HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Playback link is invalid or has expired")
+    try:
+        encoded_payload, signature = token.split(".")
+        payload = b64decode(encoded_payload).decode()
+        # Bytes: compare_digest raises on str arguments with non-ASCII characters
+        if not hmac.compare_digest(signature.encode(), sign_playback(payload).encode()):
+            raise invalid
+        clip_id, expires, flags, bitrate, file_path = payload.split("|", 4)
+        grant = PlaybackGrant(int(clip_id), file_path, "p" in flags, "f" in flags, int(expires), int(bitrate) if bitrate else None)
+    except (ValueError, UnicodeDecodeError):
+        raise invalid
+
+    if grant.expires < time.time():
+        raise invalid
+    return grant
@@ -14,4 +14,15 @@ def send_discord_notification(clip: Clip):
         response.raise_for_status()
     except Exception as e:
         print(f"Discord notification failed: {e}")
-        
\ No newline at end of file
+
+def notify_clip_uploaded(clip_id: int) -> None:
+    """Job handler for "discord_notification" jobs."""
+    from database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        clip = db.query(Clip).filter(Clip.id == clip_id).first()
+        if clip:
+            send_discord_notification(clip)
+    finally:
+        db.close()
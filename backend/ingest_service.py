@@ -0,0 +1,439 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from functools import partial
+from pathlib import Path
+from uuid import uuid4
+from fastapi import HTTPException
+from python_multipart.multipart import MultipartParser, parse_options_header
+from python_multipart.exceptions import FormParserError
+import asyncio
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+import ffmpeg
+
+UPLOAD_DIR = "uploads"
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+MAX_FILE_SIZE = 1024 * 1024 * 1024
+ALLOWED_VIDEO_EXTENSIONS = ('.mp4', '.webm')
+
+SESSION_DIR = Path(UPLOAD_DIR) / "sessions"
+SESSION_DIR.mkdir(parents=True, exist_ok=True)
+UPLOAD_SESSION_TTL = timedelta(hours=int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")))
+
+OBJECTS_DIR = Path(UPLOAD_DIR) / "objects"
+OBJECTS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Derived media (HLS renditions, ...) lives next to the blob it was made from and is shared the same way
+MEDIA_DIR = Path(UPLOAD_DIR) / "media"
+MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+# Disk writes, renames, hashing and ffprobe run here so uploads never block the event loop
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+ingest_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+async def run_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(ingest_executor, partial(func, *args, **kwargs))
+
+class ClipWriter:
+    """Streams an upload into a temp file on the ingest executor, hashing and enforcing MAX_FILE_SIZE as it goes."""
+    
+    def __init__(self, temp_path: str | None = None, mode: str = "wb", max_size: int = MAX_FILE_SIZE):
+        self.temp_path = temp_path or f"{UPLOAD_DIR}/temp_{uuid4()}"
+        self.mode = mode
+        self.max_size = max_size
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self._file = None
+    
+    async def open(self) -> "ClipWriter":
+        self._file = await run_blocking(open, self.temp_path, self.mode)
+        return self
+    
+    def _write(self, chunk: bytes) -> None:
+        self.hasher.update(chunk)
+        self._file.write(chunk)
+    
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise HTTPException(status_code=400, detail="File too large (max 1GB)")
+        await run_blocking(self._write, chunk)
+    
+    async def close(self) -> None:
+        if self._file and not self._file.closed:
+            await run_blocking(self._file.close)
+    
+    async def discard(self) -> None:
+        await self.close()
+        if os.path.exists(self.temp_path):
+            await run_blocking(os.remove, self.temp_path)
+    
+    @property
+    def content_hash(self) -> str:
+        return self.hasher.hexdigest()
+
+class StreamingClipUpload:
+    """
+    Multipart parser for the clip upload route. The video part goes straight into a ClipWriter
+    (size limit, extension check and hashing applied while streaming) instead of being spooled
+    to a temporary file first; the small text fields are kept in memory.
+    """
+    
+    max_field_size = 64 * 1024
+    
+    def __init__(self, headers, stream, file_field: str = "file"):
+        self.headers = headers
+        self.stream = stream
+        self.file_field = file_field
+        self.fields: dict[str, str] = {}
+        self.filename: str | None = None
+        self.writer: ClipWriter | None = None
+        self._part_name = ""
+        self._part_is_file = False
+        self._part_data = bytearray()
+        self._header_field = b""
+        self._header_value = b""
+        self._content_disposition = b""
+        self._file_chunks: list[bytes] = []
+    
+    def on_part_begin(self) -> None:
+        self._part_name = ""
+        self._part_is_file = False
+        self._part_data = bytearray()
+        self._content_disposition = b""
+    
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+    
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+    
+    def on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._content_disposition = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+    
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._content_disposition)
+        self._part_name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        if b"filename" not in options:
+            return
+        if self._part_name != self.file_field or self.filename is not None:
+            raise HTTPException(status_code=400, detail="Unexpected file in upload")
+        filename = os.path.basename(options[b"filename"].decode("utf-8", errors="replace"))
+        if not is_allowed_video(filename):
+            raise HTTPException(status_code=400, detail="Only MP4 and WEBM files allowed")
+        self.filename = filename
+        self._part_is_file = True
+    
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part_is_file:
+            self._file_chunks.append(data[start:end])
+            return
+        self._part_data.extend(data[start:end])
+        if len(self._part_data) > self.max_field_size:
+            raise HTTPException(status_code=400, detail=f"Field '{self._part_name}' is too large")
+    
+    def on_part_end(self) -> None:
+        if not self._part_is_file:
+            self.fields[self._part_name] = self._part_data.decode("utf-8", errors="replace")
+    
+    async def _flush_file_chunks(self) -> None:
+        if not self._file_chunks:
+            return
+        if self.writer is None:
+            self.writer = await ClipWriter().open()
+        data = b"".join(self._file_chunks)
+        self._file_chunks.clear()
+        await self.writer.write(data)
+    
+    async def parse(self) -> "StreamingClipUpload":
+        content_length = self.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE + self.max_field_size:
+            raise HTTPException(status_code=400, detail="File too large (max 1GB)")
+        
+        _, params = parse_options_header(self.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+        
+        parser = MultipartParser(boundary, {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        })
+        
+        try:
+            async for chunk in self.stream:
+                parser.write(chunk)
+                await self._flush_file_chunks()
+            parser.finalize()
+            await self._flush_file_chunks()
+            if self.writer is None and self.filename is not None:
+                # Empty file part: still produce an (empty) file so size checks downstream stay uniform
+                self.writer = await ClipWriter().open()
+            if self.writer is not None:
+                await self.writer.close()
+        except BaseException as e:
+            await self.discard()
+            if isinstance(e, FormParserError):
+                raise HTTPException(status_code=400, detail="Malformed multipart upload")
+            raise
+        
+        return self
+    
+    async def discard(self) -> None:
+        if self.writer is not None:
+            await self.writer.discard()
+
+def is_allowed_video(filename: str) -> bool:
+    return filename.lower().endswith(ALLOWED_VIDEO_EXTENSIONS)
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def content_path(content_hash: str, filename: str) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    return f"{OBJECTS_DIR.as_posix()}/{content_hash[:2]}/{content_hash}{ext}"
+
+def store_content(temp_path: str, content_hash: str, filename: str) -> str:
+    """Move an uploaded file to its content-addressed path; identical uploads share one blob."""
+    file_path = content_path(content_hash, filename)
+    if os.path.exists(file_path):
+        os.remove(temp_path)
+    else:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(temp_path, file_path)
+    return file_path
+
+def media_dir(file_path: str) -> Path:
+    return MEDIA_DIR / os.path.basename(file_path)
+
+def release_clip_files(db, clips) -> None:
+    """Remove the blobs of clips that are being deleted, unless another clip still points at them."""
+    from models import Clip
+
+    clip_ids = [clip.id for clip in clips]
+    for file_path in {clip.file_path for clip in clips}:
+        references = db.query(Clip).filter(
+            Clip.file_path == file_path,
+            Clip.id.notin_(clip_ids)
+        ).count()
+        if references:
+            print(f"Keeping shared file {file_path} ({references} other clip(s))")
+            continue
+        if os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+                print(f"Successfully deleted file at: {file_path}")
+            except Exception as e:
+                print(f"Error deleting file: {e}")
+        shutil.rmtree(media_dir(file_path), ignore_errors=True)
+
+def stored_blob_paths() -> set[str]:
+    """Every file under the object store, from one directory walk instead of a stat per clip."""
+    paths = set()
+    for root, _, files in os.walk(OBJECTS_DIR):
+        for name in files:
+            paths.add(Path(root, name).as_posix())
+    return paths
+
+def reconcile_file_states(db) -> tuple[int, int]:
+    """
+    Mark clips whose blob has gone missing, and restore ones whose blob is back. Rows are read
+    before storage is listed: a committed clip's blob was already stored, so an upload racing
+    the reconciler can't be flagged as missing. Returns (missing, restored).
+    """
+    from models import Clip
+    from schemas import FileState
+
+    rows = db.query(Clip.file_path, Clip.file_state).distinct().all()
+    stored = stored_blob_paths()
+    objects_prefix = f"{OBJECTS_DIR.as_posix()}/"
+
+    missing, restored = set(), set()
+    for file_path, file_state in rows:
+        if file_path.startswith(objects_prefix):
+            exists = file_path in stored
+        else:
+            # Uploads from before content-addressed storage
+            exists = os.path.exists(file_path)
+        if not exists and file_state == FileState.PRESENT:
+            missing.add(file_path)
+        elif exists and file_state == FileState.MISSING:
+            restored.add(file_path)
+
+    for file_paths, file_state in ((missing, FileState.MISSING), (restored, FileState.PRESENT)):
+        file_paths = sorted(file_paths)
+        for i in range(0, len(file_paths), 500):
+            db.query(Clip).filter(Clip.file_path.in_(file_paths[i:i + 500])).update(
+                {Clip.file_state: file_state}, synchronize_session=False
+            )
+    db.commit()
+    return len(missing), len(restored)
+
+MEDIA_METADATA_FIELDS = (
+    "duration", "width", "height", "fps", "video_codec", "audio_codec",
+    "bitrate", "container", "keyframe_interval",
+)
+KEYFRAME_PROBE_SECONDS = 30
+
+def parse_frame_rate(rate: str | None) -> float | None:
+    try:
+        numerator, denominator = (rate or "").split("/")
+        if float(denominator) == 0:
+            return None
+        return round(float(numerator) / float(denominator), 3)
+    except ValueError:
+        return None
+
+def container_name(format_name: str, file_path: str) -> str:
+    formats = format_name.split(",")
+    ext = os.path.splitext(file_path)[1].lower().lstrip(".")
+    if ext in formats:
+        return ext
+    return formats[0]
+
+def probe_keyframe_interval(file_path: str) -> float | None:
+    """Mean spacing of video keyframes over the first KEYFRAME_PROBE_SECONDS, read from packet flags (no decoding)."""
+    try:
+        probe = ffmpeg.probe(
+            file_path,
+            select_streams="v:0",
+            show_entries="packet=pts_time,flags",
+            read_intervals=f"%+{KEYFRAME_PROBE_SECONDS}"
+        )
+    except Exception as e:
+        print(f"Could not read keyframes due to an error: {e}")
+        return None
+
+    keyframes = sorted(
+        float(packet["pts_time"]) for packet in probe.get("packets", [])
+        if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A")
+    )
+    if len(keyframes) < 2:
+        return None
+    return round((keyframes[-1] - keyframes[0]) / (len(keyframes) - 1), 3)
+
+def probe_media(file_path: str) -> dict:
+    """Everything later stages need to know about a video, probed once at ingest and stored on the Clip."""
+    metadata = dict.fromkeys(MEDIA_METADATA_FIELDS)
+    try:
+        probe = ffmpeg.probe(file_path)
+    except Exception as e:
+        print(f"Could not probe the video due to an error: {e}")
+        return metadata
+
+    media_format = probe.get("format", {})
+    streams = probe.get("streams", [])
+    video_stream = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+    audio_stream = next((stream for stream in streams if stream.get("codec_type") == "audio"), None)
+
+    if media_format.get("duration"):
+        metadata["duration"] = int(float(media_format["duration"]))
+    if media_format.get("bit_rate"):
+        metadata["bitrate"] = int(media_format["bit_rate"])
+    if media_format.get("format_name"):
+        metadata["container"] = container_name(media_format["format_name"], file_path)
+    if video_stream:
+        metadata["width"] = video_stream.get("width")
+        metadata["height"] = video_stream.get("height")
+        metadata["fps"] = parse_frame_rate(video_stream.get("avg_frame_rate")) or parse_frame_rate(video_stream.get("r_frame_rate"))
+        metadata["video_codec"] = video_stream.get("codec_name")
+        metadata["keyframe_interval"] = probe_keyframe_interval(file_path)
+    if audio_stream:
+        metadata["audio_codec"] = audio_stream.get("codec_name")
+
+    return metadata
+
+def clip_media_metadata(clip) -> dict:
+    return {field: getattr(clip, field) for field in MEDIA_METADATA_FIELDS}
+
+def process_media_metadata(clip_id: int, video_path: str) -> None:
+    """Job handler for "metadata" jobs, which fill in clips stored before metadata was persisted."""
+    from database import SessionLocal
+    from models import Clip
+
+    if not os.path.exists(video_path):
+        print(f"Skipping metadata for clip {clip_id}: {video_path} no longer exists")
+        return
+
+    metadata = probe_media(video_path)
+    if metadata["width"] is None:
+        raise RuntimeError(f"Could not probe metadata for clip {clip_id}")
+
+    db = SessionLocal()
+    try:
+        db.query(Clip).filter(Clip.file_path == video_path).update(
+            {getattr(Clip, field): value for field, value in metadata.items()}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def session_part_path(session_id: str) -> Path:
+    return SESSION_DIR / f"{session_id}.part"
+
+def session_offset(session_id: str) -> int:
+    """Bytes durably received for a session; the part file on disk is the source of truth."""
+    part_path = session_part_path(session_id)
+    return part_path.stat().st_size if part_path.exists() else 0
+
+def lock_session_part(session_id: str):
+    """
+    The session's part file, open for appending under an exclusive lock, or None while another
+    request holds it. flock spans processes, so a retried chunk can't interleave with the original.
+    """
+    part = open(session_part_path(session_id), "ab")
+    try:
+        fcntl.flock(part.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        part.close()
+        return None
+    return part
+
+def parse_content_range(header: str | None) -> tuple[int, int, int] | None:
+    """Parse 'bytes start-end/total' into (start, end, total), or None if malformed."""
+    if not header:
+        return None
+    match = CONTENT_RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    start, end, total = (int(group) for group in match.groups())
+    if end < start or end >= total:
+        return None
+    return start, end, total
+
+def remove_session_file(session_id: str) -> None:
+    part_path = session_part_path(session_id)
+    if part_path.exists():
+        try:
+            os.remove(part_path)
+        except Exception as e:
+            print(f"Error deleting upload session file {part_path}: {e}")
+
+def prune_expired_sessions(db) -> None:
+    from models import UploadSession
+
+    cutoff = datetime.now(timezone.utc) - UPLOAD_SESSION_TTL
+    expired = db.query(UploadSession).filter(UploadSession.created_at < cutoff).all()
+    for upload_session in expired:
+        remove_session_file(upload_session.id)
+        db.delete(upload_session)
+    if expired:
+        db.commit()
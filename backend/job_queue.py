@@ -0,0 +1,120 @@
+from datetime import datetime, timezone, timedelta
+from sqlalchemy.orm import Session
+from models import Job, Clip
+from schemas import JobStatus, ProcessingStatus
+import os
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_RETRY_MAX_SECONDS = int(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+JOB_LOCK_TIMEOUT = timedelta(minutes=int(os.getenv("JOB_LOCK_TIMEOUT_MINUTES", "30")))
+
+def enqueue_job(db: Session, kind: str, clip_id: int | None = None, payload: dict | None = None,
+                max_attempts: int = JOB_MAX_ATTEMPTS) -> Job:
+    """Add a job to the queue; the caller commits so the job lands atomically with its clip changes."""
+    job = Job(
+        kind=kind,
+        clip_id=clip_id,
+        payload=payload or {},
+        status=JobStatus.QUEUED,
+        max_attempts=max_attempts,
+        run_after=datetime.now(timezone.utc)
+    )
+    db.add(job)
+    return job
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1)))
+
+def requeue_stale_jobs(db: Session) -> int:
+    """Jobs whose worker died mid-run are put back in the queue once their lock times out."""
+    cutoff = datetime.now(timezone.utc) - JOB_LOCK_TIMEOUT
+    requeued = db.query(Job).filter(
+        Job.status == JobStatus.RUNNING,
+        Job.locked_at < cutoff
+    ).update({
+        Job.status: JobStatus.QUEUED,
+        Job.locked_by: None,
+        Job.locked_at: None
+    }, synchronize_session=False)
+    db.commit()
+    return requeued
+
+def claim_next_job(db: Session, worker_id: str) -> Job | None:
+    """
+    Atomically move the oldest runnable job to RUNNING. The conditional UPDATE means two
+    workers racing for the same row cannot both win, on SQLite as well as PostgreSQL.
+    """
+    now = datetime.now(timezone.utc)
+    candidate_ids = [
+        row.id for row in db.query(Job.id).filter(
+            Job.status == JobStatus.QUEUED,
+            Job.run_after <= now
+        ).order_by(Job.run_after, Job.id).limit(10)
+    ]
+
+    for job_id in candidate_ids:
+        claimed = db.query(Job).filter(
+            Job.id == job_id,
+            Job.status == JobStatus.QUEUED
+        ).update({
+            Job.status: JobStatus.RUNNING,
+            Job.locked_by: worker_id,
+            Job.locked_at: now,
+            Job.attempts: Job.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return db.query(Job).filter(Job.id == job_id).first()
+
+    return None
+
+def complete_job(db: Session, job_id: int) -> None:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        return
+    job.status = JobStatus.DONE
+    job.finished_at = datetime.now(timezone.utc)
+    job.last_error = None
+    job.locked_by = None
+    job.locked_at = None
+    db.commit()
+    refresh_processing_status(db, job.clip_id)
+
+def fail_job(db: Session, job_id: int, error: str) -> None:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        return
+    job.last_error = error
+    job.locked_by = None
+    job.locked_at = None
+    if job.attempts >= job.max_attempts:
+        job.status = JobStatus.FAILED
+        job.finished_at = datetime.now(timezone.utc)
+        print(f"Job {job.id} ({job.kind}) failed permanently after {job.attempts} attempts: {error}")
+    else:
+        job.status = JobStatus.QUEUED
+        job.run_after = datetime.now(timezone.utc) + retry_delay(job.attempts)
+        print(f"Job {job.id} ({job.kind}) failed, retrying in {retry_delay(job.attempts)}: {error}")
+    db.commit()
+    refresh_processing_status(db, job.clip_id)
+
+def refresh_processing_status(db: Session, clip_id: int | None) -> None:
+    """A clip is pending while any of its jobs is outstanding, failed if one gave up, done otherwise."""
+    if clip_id is None:
+        return
+    clip = db.query(Clip).filter(Clip.id == clip_id).first()
+    if not clip:
+        return
+
+    statuses = {status for (status,) in db.query(Job.status).filter(Job.clip_id == clip_id).distinct()}
+    if JobStatus.QUEUED in statuses or JobStatus.RUNNING in statuses:
+        processing_status = ProcessingStatus.PENDING
+    elif JobStatus.FAILED in statuses:
+        processing_status = ProcessingStatus.FAILED
+    else:
+        processing_status = ProcessingStatus.DONE
+
+    if clip.processing_status != processing_status:
+        clip.processing_status = processing_status
+        db.commit()
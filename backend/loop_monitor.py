@@ -0,0 +1,56 @@
+from collections import deque
+import asyncio
+import os
+import time
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+LOOP_LAG_SAMPLES = 600
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a fixed sleep; anything blocking the loop shows up as lag."""
+    
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, samples: int = LOOP_LAG_SAMPLES):
+        self.interval = interval
+        self.samples = deque(maxlen=samples)
+        self.max_lag = 0.0
+        self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+        
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+        
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": len(ordered),
+            "p50_ms": round(percentile(0.50) * 1000, 3),
+            "p99_ms": round(percentile(0.99) * 1000, 3),
+            "window_max_ms": round((ordered[-1] if ordered else 0.0) * 1000, 3),
+            "max_ms": round(self.max_lag * 1000, 3),
+        }
+
+loop_monitor = LoopLagMonitor()
@@ -1,43 +1,62 @@
 from datetime import datetime, timezone, timedelta
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks, Response, Cookie, Request
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Response, Cookie, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from typing import List, Optional
 from dotenv import load_dotenv
 import shutil
 import os
 import html as html_lib
 from uuid import uuid4
-import ffmpeg
 
-from database import get_db, Base, engine
-from models import User, Clip, Comment, CommentDislike, CommentLike, ClipLike
-from schemas import UserCreate, UserResponse, Token, ClipResponse, CommentResponse, CommentCreate, CommentUpdate, ClipUpdate, PasswordRequest, PasswordResetRequest, EmailRequest, ProfilePictureResponse, UserRole, UserApprovalUpdate, UserRoleUpdate, AdminStats
+from database import get_db, engine, ReadYourWritesMiddleware
+from models import User, Clip, Comment, CommentDislike, CommentLike, ClipLike, UploadSession
+from schemas import UserCreate, UserResponse, Token, ClipResponse, CommentResponse, CommentCreate, CommentUpdate, ClipUpdate, PasswordRequest, PasswordResetRequest, EmailRequest, ProfilePictureResponse, UserRole, UserApprovalUpdate, UserRoleUpdate, AdminStats, ProcessingStatus, FileState, UploadSessionCreate, UploadSessionResponse
 from auth import hash_password, verify_password, create_access_token, get_current_user, get_current_user_optional, cookie_domain, is_prod
 from email_service import send_username_recovery_email, send_password_recovery_email, generate_reset_token
 from image_utils import save_profile_picture, delete_profile_picture_file
 from init_admin import create_admin_user
 from contextlib import asynccontextmanager
 from auth_utils import require_admin, require_approved, require_role, require_moderator_or_admin
-from thumbnail_service import process_and_store_thumbnail, cleanup_thumbnails
+from thumbnail_service import cleanup_thumbnails, copy_thumbnails
+from job_queue import enqueue_job
+from transcode_service import hls_file_path, hls_media_type
+from storyboard_service import storyboard_file_path, storyboard_media_type
+from delivery_service import serve_media_file, media_cache_control, video_media_type, clip_playback_url, verify_playback_token
+from ingest_service import UPLOAD_DIR, MAX_FILE_SIZE, StreamingClipUpload, run_blocking, is_allowed_video, probe_media, clip_media_metadata, hash_file, store_content, release_clip_files, session_part_path, session_offset, parse_content_range, lock_session_part, remove_session_file, prune_expired_sessions
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from loop_monitor import loop_monitor
+from media_cache import media_cache
+from admin_stats import admin_stats_cache
+from migrations import run_migrations
+from search_service import apply_search, apply_user_search
+from pagination import paginate, encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from stream_pacing import stream_pacer
 from auth import ACCESS_TOKEN_EXPIRATION
 
-Base.metadata.create_all(bind=engine)
+# Creates the tables too, one worker at a time
+run_migrations(engine)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print(" Starting Clips API...")
     create_admin_user()
     mount_static_files(app)
+    loop_monitor.start()
     yield
+    await loop_monitor.stop()
     print("👋 Shutting down ClipHub API...")
 
 
 app = FastAPI(lifespan=lifespan)
 
+app.add_middleware(ReadYourWritesMiddleware, secure=is_prod, domain=cookie_domain)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:4200",
@@ -45,15 +64,19 @@ app.add_middleware(
                    "https://192.168.11.180"],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER]
 )
 
 load_dotenv()
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-MAX_FILE_SIZE = 1024 * 1024 * 1024
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:4200")
+
+CLIP_PAGE_SIZE = 50
+CLIP_PAGE_MAX = 200
+COMMENT_PAGE_SIZE = 20
+COMMENT_PAGE_MAX = 100
+ADMIN_USER_PAGE_MAX = 500
     
 def mount_static_files(app: FastAPI):
     static_mounts = {
@@ -134,62 +157,113 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     db.refresh(new_user)
     return new_user
 
-@app.post("/api/clips/upload", response_model=ClipResponse)
-async def upload_clip(
-    background_tasks: BackgroundTasks,
-    title: str = Form(...),
-    description: str = Form(None),
-    file: UploadFile = File(...),
-    post_to_discord: bool = Form(False),
-    current_user: User = Depends(require_approved),
-    db: Session = Depends(get_db)
-):
-    if not file.filename.endswith(('.mp4', '.webm')):
-        raise HTTPException(status_code=400, detail="Only MP4 and WEBM files allowed")
-    
-    file_size = 0
-    chunk_size = 1024 * 1024
-    temp_path = f"{UPLOAD_DIR}/temp_{uuid4()}"
-    
-    with open(temp_path, "wb") as buffer:
-        while chunk := await file.read(chunk_size):
-            file_size += len(chunk)
-            if file_size > MAX_FILE_SIZE:
-                os.remove(temp_path)
-                raise HTTPException(status_code=400, detail="File too large (max 1GB)")
-            buffer.write(chunk)
-            
-    unique_filename = f"{uuid4()}_{file.filename}"
-    file_path = f"{UPLOAD_DIR}/{unique_filename}"
-    os.rename(temp_path, file_path)
-    
-    try:
-        probe = ffmpeg.probe(file_path)
-        duration = float(probe['format']['duration'])
-        duration_seconds = int(duration)
-    except Exception as e:
-        print(f"Could not get the video duration due to an error: {e}")
-        duration_seconds = None
+async def store_uploaded_clip(
+    db: Session,
+    current_user: User,
+    filename: str,
+    temp_path: str,
+    content_hash: str,
+    file_size: int,
+    title: str,
+    description: Optional[str],
+    post_to_discord: bool,
+    upload_session: Optional[UploadSession] = None
+) -> ClipResponse:
+    file_path = await run_blocking(store_content, temp_path, content_hash, filename)
+    
+    # A clip with identical content already has its duration and thumbnails
+    existing_clip = await run_in_threadpool(find_present_clip, db, file_path)
+    
+    if existing_clip:
+        metadata = clip_media_metadata(existing_clip)
+        # The shared blob may have been remuxed since it was first uploaded
+        file_size = existing_clip.file_size
+    else:
+        metadata = await run_blocking(probe_media, file_path)
         
     new_clip = Clip(
         user_id=current_user.id,
-        filename=file.filename,
+        filename=filename,
         file_path=file_path,
+        content_hash=content_hash,
         file_size=file_size,
-        duration=duration_seconds,
         title=title,
-        description=description
+        description=description,
+        **metadata
     )
+    # Session work blocks on the connection pool, so it runs on a thread like the sync endpoints
+    return await run_in_threadpool(save_uploaded_clip, db, current_user, new_clip, existing_clip,
+                                   post_to_discord, upload_session)
+
+def find_present_clip(db: Session, file_path: str) -> Optional[Clip]:
+    return db.query(Clip).filter(Clip.file_path == file_path, Clip.file_state == FileState.PRESENT).first()
+
+def save_uploaded_clip(
+    db: Session,
+    current_user: User,
+    new_clip: Clip,
+    existing_clip: Optional[Clip],
+    post_to_discord: bool,
+    upload_session: Optional[UploadSession]
+) -> ClipResponse:
+    file_path = new_clip.file_path
+    duration_seconds = new_clip.duration
     try:
         db.add(new_clip)
+        db.flush()
+        
+        thumbnail_path = None
+        if existing_clip and existing_clip.thumbnail_path:
+            thumbnail_path = copy_thumbnails(existing_clip.id, new_clip.id)
+        
+        # Media jobs are committed together with the clip so a restart can't lose them
+        jobs = []
+        if existing_clip and existing_clip.faststart_remuxed:
+            new_clip.faststart_remuxed = True
+        elif file_path.endswith(".mp4"):
+            jobs.append(enqueue_job(db, "faststart", new_clip.id, {"video_path": file_path}))
+        
+        if thumbnail_path:
+            new_clip.thumbnail_path = thumbnail_path
+            if post_to_discord:
+                jobs.append(enqueue_job(db, "discord_notification", new_clip.id))
+        else:
+            jobs.append(enqueue_job(db, "thumbnail", new_clip.id, {
+                "video_path": file_path,
+                "notify_discord": post_to_discord,
+                "duration": duration_seconds
+            }))
+        
+        if existing_clip and existing_clip.hls_ready:
+            new_clip.hls_ready = True
+        else:
+            jobs.append(enqueue_job(db, "transcode_hls", new_clip.id, {
+                "video_path": file_path,
+                "width": new_clip.width,
+                "height": new_clip.height
+            }))
+        
+        if existing_clip and existing_clip.storyboard_ready:
+            new_clip.storyboard_ready = True
+        elif duration_seconds:
+            jobs.append(enqueue_job(db, "storyboard", new_clip.id, {"video_path": file_path, "duration": duration_seconds}))
+        
+        if not jobs:
+            new_clip.processing_status = ProcessingStatus.DONE
+        
+        # The session goes in the same commit as the clip, so a failed save leaves it to retry
+        if upload_session:
+            db.delete(upload_session)
+        
         db.commit()
         db.refresh(new_clip)
     except Exception as e:
-        os.remove(file_path)
+        db.rollback()
+        if new_clip.id:
+            cleanup_thumbnails(new_clip.id)
+        if not existing_clip:
+            os.remove(file_path)
         raise HTTPException(status_code=500, detail="Failed to save clip")
-        
-    
-    background_tasks.add_task(process_and_store_thumbnail, new_clip.id, file_path, post_to_discord)
     
     
     response = ClipResponse(
@@ -197,19 +271,221 @@ async def upload_clip(
         user_id=new_clip.user_id,
         filename=new_clip.filename,
         file_path=new_clip.file_path,
-        thumbnail_path=None,
+        thumbnail_path=thumbnail_path,
         title=new_clip.title,
         description=new_clip.description,
         uploaded_at=new_clip.uploaded_at,
         file_size=new_clip.file_size,
         duration=new_clip.duration,
+        width=new_clip.width,
+        height=new_clip.height,
         username=current_user.username,
         likes=new_clip.likes,
         user_has_liked=False,
-        private=new_clip.private
+        private=new_clip.private,
+        processing_status=new_clip.processing_status,
+        hls_ready=new_clip.hls_ready,
+        storyboard_ready=new_clip.storyboard_ready,
+        playback_url=clip_playback_url(new_clip)
     )
     return response
 
+@app.post("/api/clips/upload", response_model=ClipResponse)
+async def upload_clip(
+    request: Request,
+    current_user: User = Depends(require_approved),
+    db: Session = Depends(get_db)
+):
+    # Form fields: file, title, description, post_to_discord. The body is parsed here rather than
+    # through Form()/File() so the video streams straight to disk without being spooled first.
+    upload = await StreamingClipUpload(request.headers, request.stream()).parse()
+    
+    title = upload.fields.get("title", "")
+    description = upload.fields.get("description") or None
+    post_to_discord = upload.fields.get("post_to_discord", "false").lower() in ("true", "1", "on", "yes")
+    
+    if upload.writer is None:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    
+    if not title.strip():
+        await upload.discard()
+        raise HTTPException(status_code=400, detail="Title cannot be empty")
+    
+    writer = upload.writer
+    return await store_uploaded_clip(db, current_user, upload.filename, writer.temp_path,
+                                     writer.content_hash, writer.size, title, description, post_to_discord)
+
+def get_owned_upload_session(upload_id: str, current_user: User, db: Session) -> UploadSession:
+    upload_session = db.query(UploadSession).filter(UploadSession.id == upload_id).first()
+    if not upload_session or upload_session.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return upload_session
+
+def upload_session_response(upload_session: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=upload_session.id,
+        filename=upload_session.filename,
+        file_size=upload_session.file_size,
+        offset=session_offset(upload_session.id)
+    )
+
+@app.post("/api/clips/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload_session(
+    upload: UploadSessionCreate,
+    current_user: User = Depends(require_approved),
+    db: Session = Depends(get_db)
+):
+    if not is_allowed_video(upload.filename):
+        raise HTTPException(status_code=400, detail="Only MP4 and WEBM files allowed")
+    
+    if upload.file_size <= 0:
+        raise HTTPException(status_code=400, detail="File is empty")
+    
+    if upload.file_size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="File too large (max 1GB)")
+    
+    if not upload.title.strip():
+        raise HTTPException(status_code=400, detail="Title cannot be empty")
+    
+    prune_expired_sessions(db)
+    
+    upload_session = UploadSession(
+        id=uuid4().hex,
+        user_id=current_user.id,
+        filename=upload.filename,
+        file_size=upload.file_size,
+        title=upload.title,
+        description=upload.description,
+        post_to_discord=upload.post_to_discord
+    )
+    db.add(upload_session)
+    db.commit()
+    db.refresh(upload_session)
+    
+    session_part_path(upload_session.id).touch()
+    
+    return upload_session_response(upload_session)
+
+@app.get("/api/clips/uploads/{upload_id}", response_model=UploadSessionResponse)
+def get_upload_session(upload_id: str, current_user: User = Depends(require_approved), db: Session = Depends(get_db)):
+    upload_session = get_owned_upload_session(upload_id, current_user, db)
+    return upload_session_response(upload_session)
+
+@app.put("/api/clips/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_session_chunk(
+    upload_id: str,
+    request: Request,
+    current_user: User = Depends(require_approved),
+    db: Session = Depends(get_db)
+):
+    upload_session = await run_in_threadpool(get_owned_upload_session, upload_id, current_user, db)
+    
+    content_range = parse_content_range(request.headers.get("content-range"))
+    if not content_range:
+        raise HTTPException(status_code=400, detail="Missing or invalid Content-Range header (expected 'bytes start-end/total')")
+    
+    start, end, total = content_range
+    if total != upload_session.file_size:
+        raise HTTPException(status_code=400, detail="Content-Range total does not match the upload size")
+    
+    # A client that timed out may retry while its first request is still streaming
+    part = await run_blocking(lock_session_part, upload_session.id)
+    if part is None:
+        raise upload_session_busy(upload_session)
+    
+    expected_length = end - start + 1
+    received = 0
+    try:
+        # Checked under the lock: the part file on disk is the source of truth
+        offset = os.fstat(part.fileno()).st_size
+        if start != offset:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload offset mismatch, resume from byte {offset}",
+                headers={"Upload-Offset": str(offset)}
+            )
+        
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > expected_length:
+                    raise HTTPException(status_code=400, detail="Chunk is larger than its Content-Range")
+                await run_blocking(part.write, chunk)
+        except HTTPException:
+            await run_blocking(part.truncate, offset)
+            raise
+        except ClientDisconnect:
+            # Whatever reached the disk stays; the client resumes from the new offset.
+            print(f"Client disconnected during upload {upload_session.id} at {offset + received} bytes")
+            raise HTTPException(status_code=400, detail="Client disconnected")
+    finally:
+        await run_blocking(part.close)
+    
+    if received < expected_length:
+        # The bytes that did arrive are kept, like a disconnect; the client resumes after them
+        raise HTTPException(
+            status_code=400,
+            detail=f"Chunk is shorter than its Content-Range, resume from byte {offset + received}",
+            headers={"Upload-Offset": str(offset + received)}
+        )
+
+    return upload_session_response(upload_session)
+
+@app.post("/api/clips/uploads/{upload_id}/complete", response_model=ClipResponse)
+async def complete_upload_session(
+    upload_id: str,
+    current_user: User = Depends(require_approved),
+    db: Session = Depends(get_db)
+):
+    upload_session = await run_in_threadpool(get_owned_upload_session, upload_id, current_user, db)
+    
+    # Held until the clip is saved, so a retried completion can't create the clip twice
+    part = await run_blocking(lock_session_part, upload_session.id)
+    if part is None:
+        raise upload_session_busy(upload_session)
+    
+    try:
+        offset = os.fstat(part.fileno()).st_size
+        if offset != upload_session.file_size:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload is incomplete ({offset} of {upload_session.file_size} bytes received)",
+                headers={"Upload-Offset": str(offset)}
+            )
+        
+        # Linked rather than moved: if saving the clip fails, the session keeps its bytes and the
+        # client can simply complete again
+        temp_path = f"{UPLOAD_DIR}/temp_{uuid4()}"
+        await run_blocking(os.link, session_part_path(upload_session.id), temp_path)
+        # Chunks arrive across requests, so the hash is computed once the file is whole
+        content_hash = await run_blocking(hash_file, temp_path)
+        
+        response = await store_uploaded_clip(db, current_user, upload_session.filename, temp_path, content_hash,
+                                              offset, upload_session.title, upload_session.description,
+                                              upload_session.post_to_discord, upload_session=upload_session)
+        await run_blocking(remove_session_file, upload_id)
+        return response
+    finally:
+        await run_blocking(part.close)
+
+def upload_session_busy(upload_session: UploadSession) -> HTTPException:
+    offset = session_offset(upload_session.id)
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Another request for this upload is in progress, resume from byte {offset}",
+        headers={"Upload-Offset": str(offset)}
+    )
+
+@app.delete("/api/clips/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_upload_session(upload_id: str, current_user: User = Depends(require_approved), db: Session = Depends(get_db)):
+    upload_session = get_owned_upload_session(upload_id, current_user, db)
+    
+    remove_session_file(upload_session.id)
+    db.delete(upload_session)
+    db.commit()
+    
+    return None
+
 @app.get("/api/clips/{clip_id}", response_model=ClipResponse)
 def get_clip_by_id(clip_id: int,  current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_db)):
     clip = db.query(Clip).filter(Clip.id == clip_id).first()
@@ -223,7 +499,7 @@ def get_clip_by_id(clip_id: int,  current_user: Optional[User] = Depends(get_cur
         if current_user.id != clip.user_id and current_user.role != UserRole.ADMIN:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="This clip is private")
     
-    if not os.path.exists(clip.file_path):
+    if clip.file_state != FileState.PRESENT:
         raise HTTPException(status_code=404, detail="Video file not found")
     
     user_has_liked = False
@@ -244,16 +520,23 @@ def get_clip_by_id(clip_id: int,  current_user: Optional[User] = Depends(get_cur
         uploaded_at=clip.uploaded_at,
         file_size=clip.file_size,
         duration=clip.duration,
+        width=clip.width,
+        height=clip.height,
         username=clip.user.username,
         likes=clip.likes,
         user_has_liked=user_has_liked,
-        private=clip.private
+        private=clip.private,
+        processing_status=clip.processing_status,
+        hls_ready=clip.hls_ready,
+        storyboard_ready=clip.storyboard_ready,
+        playback_url=clip_playback_url(clip)
     )
 
 @app.get("/api/clips", response_model=List[ClipResponse])
-def get_clips(user_id: int = None, search: str = None, min_duration: int = None, max_duration: int = None, 
-               current_user: Optional[User] = Depends(require_approved), skip: int = 0, limit: int = None, db: Session = Depends(get_db)):
-    query = db.query(Clip).join(User)
+def get_clips(response: Response, user_id: int = None, search: str = None, min_duration: int = None, max_duration: int = None, 
+               current_user: Optional[User] = Depends(require_approved), skip: int = 0, limit: int = None,
+               cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    query = db.query(Clip).join(User).options(contains_eager(Clip.user)).filter(Clip.file_state == FileState.PRESENT)
     
     if user_id:
         query = query.filter(Clip.user_id == user_id)
@@ -261,17 +544,33 @@ def get_clips(user_id: int = None, search: str = None, min_duration: int = None,
         if not current_user or (current_user.id != user_id and current_user.role != UserRole.ADMIN):
             query = query.filter(Clip.private == False)
         
-    if search:
-        query = query.filter(Clip.title.ilike(f"%{search}%"))
-        
     if min_duration:
         query = query.filter(Clip.duration >= min_duration)
     
     if max_duration:
         query = query.filter(Clip.duration <= max_duration)
     
+    page_size = max(1, min(limit or CLIP_PAGE_SIZE, CLIP_PAGE_MAX))
     
-    clips = query.order_by(Clip.uploaded_at.desc()).offset(skip).limit(limit).all()
+    if search:
+        # Ranked by relevance instead of upload time. Rank has no stable keyset, so the cursor
+        # carries an offset; search results are rarely paged deep.
+        offset = max(0, decode_cursor(cursor, int)[0] if cursor else skip)
+        clips = apply_search(query, search).offset(offset).limit(page_size + 1).all()
+        if len(clips) > page_size:
+            clips = clips[:page_size]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(offset + page_size)
+    else:
+        # Newest first, keyset on (uploaded_at, id); skip still works for clients without a cursor
+        clips = paginate(
+            query,
+            [Clip.uploaded_at, Clip.id],
+            decode_cursor(cursor, datetime, int) if cursor else None,
+            page_size,
+            response,
+            skip=skip
+        )
+    liked_ids = liked_clip_ids(db, current_user, clips)
     
     return [
         ClipResponse(
@@ -285,54 +584,139 @@ def get_clips(user_id: int = None, search: str = None, min_duration: int = None,
             uploaded_at=clip.uploaded_at,
             file_size=clip.file_size,
             duration=clip.duration,
+            width=clip.width,
+            height=clip.height,
             username=clip.user.username,
             likes=clip.likes,
-            user_has_liked=(
-                db.query(ClipLike).filter(
-                    ClipLike.clip_id == clip.id,
-                    ClipLike.user_id == current_user.id
-                ).first() is not None
-                if current_user else False
-            ),
-            private=clip.private
+            user_has_liked=clip.id in liked_ids,
+            private=clip.private,
+            processing_status=clip.processing_status,
+            hls_ready=clip.hls_ready,
+            storyboard_ready=clip.storyboard_ready,
+            playback_url=clip_playback_url(clip) if can_view_clip(clip, current_user) else None
         )
         for clip in clips
-        if os.path.exists(clip.file_path)
     ]
 
-@app.get("/api/clips/{clip_id}/video/{filename}")
-@app.get("/api/clips/{clip_id}/video")
-def stream_video(clip_id: int, filename: str = None, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_db)):
+def liked_clip_ids(db: Session, current_user: Optional[User], clips: List[Clip]) -> set:
+    """Which of a page of clips the user has liked, in one query instead of one per clip."""
+    if not current_user or not clips:
+        return set()
+    return {
+        clip_id for (clip_id,) in db.query(ClipLike.clip_id).filter(
+            ClipLike.user_id == current_user.id,
+            ClipLike.clip_id.in_([clip.id for clip in clips])
+        )
+    }
+
+def can_view_clip(clip: Clip, current_user: Optional[User]) -> bool:
+    if not clip.private:
+        return True
+    if not current_user:
+        return False
+    is_admin = current_user.role == UserRole.ADMIN or current_user.role == "admin"
+    return current_user.id == clip.user_id or is_admin
+
+def viewer_key(request: Request, current_user: Optional[User] = None) -> str:
+    """Who a stream counts against for per-viewer limits; signed playback routes only know the address."""
+    if current_user:
+        return f"user:{current_user.id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def get_viewable_clip(clip_id: int, current_user: Optional[User], db: Session) -> Clip:
     clip = db.query(Clip).filter(Clip.id == clip_id).first()
     
     if not clip:
         raise HTTPException(status_code=404, detail="Clip not found")
     
-    if clip.private:
-        if not current_user:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="This clip is private")
-        is_admin = current_user.role == UserRole.ADMIN or current_user.role == "admin"
-        if current_user.id != clip.user_id and not is_admin:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="This clip is private")            
+    if not can_view_clip(clip, current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="This clip is private")
+    
+    return clip
+
+@app.get("/api/clips/{clip_id}/video/{filename}")
+@app.get("/api/clips/{clip_id}/video")
+def stream_video(clip_id: int, request: Request, filename: str = None, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_db)):
+    clip = get_viewable_clip(clip_id, current_user, db)
     
     if not os.path.exists(clip.file_path):
         raise HTTPException(status_code=404, detail="Video file not found")
     
-    return FileResponse(
-        clip.file_path, 
-        media_type="video/webm" if clip.file_path.endswith('.webm') else "video/mp4", 
-        headers={
-          "Cache-Control": "no-cache, no-store, must-revalidate",
-          "Pragma": "no-cache",
-          "Expires": "0"
-        }
+    return serve_media_file(
+        request, clip.file_path, video_media_type(clip.file_path), media_cache_control(clip),
+        pacing_key=viewer_key(request, current_user), bitrate=clip.bitrate
     )
 
+@app.get("/api/clips/{clip_id}/hls/{name:path}")
+def stream_hls(clip_id: int, name: str, request: Request, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_db)):
+    clip = get_viewable_clip(clip_id, current_user, db)
+    
+    if not clip.hls_ready:
+        raise HTTPException(status_code=404, detail="Adaptive stream not available yet")
+    
+    path = hls_file_path(clip.file_path, name)
+    if not path or not path.exists():
+        raise HTTPException(status_code=404, detail="Stream file not found")
+    
+    return serve_media_file(request, path, hls_media_type(name), media_cache_control(clip, final=True))
+
+@app.get("/api/clips/{clip_id}/storyboard/{name}")
+def get_storyboard(clip_id: int, name: str, request: Request, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_db)):
+    clip = get_viewable_clip(clip_id, current_user, db)
+    
+    if not clip.storyboard_ready:
+        raise HTTPException(status_code=404, detail="Storyboard not available yet")
+    
+    path = storyboard_file_path(clip.file_path, name)
+    if not path or not path.exists():
+        raise HTTPException(status_code=404, detail="Storyboard file not found")
+    
+    return serve_media_file(request, path, storyboard_media_type(name), media_cache_control(clip, final=True))
+
+# Signed playback routes: the token in the path was issued after the privacy check, so range
+# requests are served without decoding the session cookie or querying the database.
+# Relative URLs inside HLS playlists and the storyboard index resolve under the same token.
+@app.get("/api/play/{token}/video/{filename}")
+@app.get("/api/play/{token}/video")
+def play_video(token: str, request: Request, filename: str = None):
+    grant = verify_playback_token(token)
+    
+    if not os.path.exists(grant.file_path):
+        raise HTTPException(status_code=404, detail="Video file not found")
+    
+    return serve_media_file(
+        request, grant.file_path, video_media_type(grant.file_path), grant.cache_control(),
+        pacing_key=viewer_key(request), bitrate=grant.bitrate
+    )
+
+@app.get("/api/play/{token}/hls/{name:path}")
+def play_hls(token: str, name: str, request: Request):
+    grant = verify_playback_token(token)
+    
+    # The ladder is swapped in complete, so its presence on disk is as good as hls_ready
+    path = hls_file_path(grant.file_path, name)
+    if not path or not path.exists():
+        raise HTTPException(status_code=404, detail="Stream file not found")
+    
+    return serve_media_file(request, path, hls_media_type(name), grant.cache_control(final=True))
+
+@app.get("/api/play/{token}/storyboard/{name}")
+def play_storyboard(token: str, name: str, request: Request):
+    grant = verify_playback_token(token)
+    
+    path = storyboard_file_path(grant.file_path, name)
+    if not path or not path.exists():
+        raise HTTPException(status_code=404, detail="Storyboard file not found")
+    
+    return serve_media_file(request, path, storyboard_media_type(name), grant.cache_control(final=True))
 
 @app.get("/api/clips/{clip_id}/comments", response_model=List[CommentResponse])
 def get_comments(
     clip_id: int, 
+    response: Response,
     include_deleted: bool = False, 
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: Optional[User] = Depends(get_current_user_optional), 
     db: Session = Depends(get_db)
     ):
@@ -346,7 +730,82 @@ def get_comments(
     if not include_deleted:
         query = query.filter(Comment.is_deleted == False)
     
-    comments = query.order_by(Comment.created_at.desc()).all()
+    query = query.options(joinedload(Comment.user))
+    
+    # Newest top-level comments first, a page at a time; replies are fetched per thread
+    comments = paginate(
+        query.filter(Comment.parent_comment_id == None),
+        [Comment.created_at, Comment.id],
+        decode_cursor(cursor, datetime, int) if cursor else None,
+        comment_page_size(limit),
+        response
+    )
+    
+    return comment_responses(db, comments, current_user)
+
+@app.get("/api/comments/{comment_id}/replies", response_model=List[CommentResponse])
+def get_comment_replies(
+    comment_id: int,
+    response: Response,
+    include_deleted: bool = False,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+    ):
+    
+    if not db.query(Comment.id).filter(Comment.id == comment_id).first():
+        raise HTTPException(status_code=404, detail="Comment not found")
+    
+    query = db.query(Comment).filter(Comment.parent_comment_id == comment_id)
+    
+    if not include_deleted:
+        query = query.filter(Comment.is_deleted == False)
+    
+    # Oldest first, so a thread reads top to bottom
+    replies = paginate(
+        query.options(joinedload(Comment.user)),
+        [Comment.created_at, Comment.id],
+        decode_cursor(cursor, datetime, int) if cursor else None,
+        comment_page_size(limit),
+        response,
+        descending=False
+    )
+    
+    return comment_responses(db, replies, current_user)
+
+def comment_page_size(limit: Optional[int]) -> int:
+    return max(1, min(limit or COMMENT_PAGE_SIZE, COMMENT_PAGE_MAX))
+
+def comment_responses(db: Session, comments: List[Comment], current_user: Optional[User]) -> List[CommentResponse]:
+    """
+    Hydrate a list of comments with a fixed number of queries however long it is: one grouped
+    count of live replies and one set query each for the viewer's likes and dislikes.
+    """
+    comment_ids = [comment.id for comment in comments]
+    reply_counts = {}
+    liked_ids = set()
+    disliked_ids = set()
+    
+    if comment_ids:
+        reply_counts = dict(
+            db.query(Comment.parent_comment_id, func.count(Comment.id))
+            .filter(Comment.parent_comment_id.in_(comment_ids), Comment.is_deleted == False)
+            .group_by(Comment.parent_comment_id)
+        )
+        if current_user:
+            liked_ids = {
+                comment_id for (comment_id,) in db.query(CommentLike.comment_id).filter(
+                    CommentLike.user_id == current_user.id,
+                    CommentLike.comment_id.in_(comment_ids)
+                )
+            }
+            disliked_ids = {
+                comment_id for (comment_id,) in db.query(CommentDislike.comment_id).filter(
+                    CommentDislike.user_id == current_user.id,
+                    CommentDislike.comment_id.in_(comment_ids)
+                )
+            }
     
     return [
         CommentResponse(
@@ -360,23 +819,10 @@ def get_comments(
             parent_comment_id=comment.parent_comment_id,
             likes=comment.likes,
             dislikes=comment.dislikes,
-            reply_count=len([r for r in comment.replies if not r.is_deleted]) if comment.replies else 0,
+            reply_count=reply_counts.get(comment.id, 0),
             is_deleted=comment.is_deleted,
-            
-            user_has_liked=(
-                db.query(CommentLike).filter(
-                    CommentLike.user_id == current_user.id,
-                    CommentLike.comment_id == comment.id
-                ).first() is not None
-                if current_user else False
-            ),
-            user_has_disliked=(
-                db.query(CommentDislike).filter(
-                    CommentDislike.user_id == current_user.id,
-                    CommentDislike.comment_id == comment.id
-                ).first() is not None
-                if current_user else False
-            ),
+            user_has_liked=comment.id in liked_ids,
+            user_has_disliked=comment.id in disliked_ids,
         )
         for comment in comments
     ]
@@ -654,10 +1100,16 @@ def update_clip_data(clip_id: int, clip_update: ClipUpdate, current_user: User =
         uploaded_at=clip.uploaded_at,
         file_size=clip.file_size,
         duration=clip.duration,
+        width=clip.width,
+        height=clip.height,
         username=clip.user.username,
         likes=clip.likes,
         user_has_liked=user_has_liked,
-        private=clip.private
+        private=clip.private,
+        processing_status=clip.processing_status,
+        hls_ready=clip.hls_ready,
+        storyboard_ready=clip.storyboard_ready,
+        playback_url=clip_playback_url(clip)
     )
         
 @app.delete("/api/clips/{clip_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -673,12 +1125,7 @@ def delete_clip(clip_id: int,
     if clip.user_id != current_user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not have permission to delete this clip.")
     
-    if os.path.exists(clip.file_path):
-        try:
-            os.remove(clip.file_path)
-            print(f"Successfully deleted file at: {clip.file_path}")
-        except Exception as e:
-            print(f"Error deleting file: {e}")
+    release_clip_files(db, [clip])
     
     cleanup_thumbnails(clip.id)
     
@@ -831,6 +1278,18 @@ def check_static():
         "sample_url": f"http://localhost:8000/uploads/profile_pictures/{files[0].name}" if files else None
     }
 
+@app.get("/debug/loop-lag")
+def check_loop_lag():
+    return loop_monitor.snapshot()
+
+@app.get("/debug/media-cache")
+def check_media_cache():
+    return media_cache.snapshot()
+
+@app.get("/debug/stream-pacing")
+def check_stream_pacing():
+    return stream_pacer.snapshot()
+
 
 @app.patch("/api/admin/users/{user_id}/role", response_model=UserResponse)
 def update_user_role(
@@ -886,8 +1345,10 @@ def update_user_approval(
 
 @app.get("/api/admin/users", response_model=List[UserResponse])
 def get_all_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     role_filter: Optional[str] = None,
     approval_filter: Optional[bool] = None,
     search: Optional[str] = None,
@@ -903,12 +1364,18 @@ def get_all_users(
         query = query.filter(User.approved == approval_filter)
     
     if search:
-        query = query.filter(
-            (User.username.ilike(f"%{search}%")) |
-            (User.email.ilike(f"%{search}%"))
-        )
-    
-    users = query.offset(skip).limit(limit).all()
+        query = apply_user_search(query, search)
+    
+    # Keyset on id; skip still works for clients that haven't moved to X-Next-Cursor
+    users = paginate(
+        query,
+        [User.id],
+        decode_cursor(cursor, int) if cursor else None,
+        max(1, min(limit, ADMIN_USER_PAGE_MAX)),
+        response,
+        descending=False,
+        skip=skip
+    )
     
     return users
 
@@ -931,12 +1398,14 @@ def delete_user(user_id: int, current_user: User = Depends(require_admin), db: S
     
     clips = db.query(Clip).filter(Clip.user_id == user_id).all()
     
+    print(f"removing {len(clips)} clip(s) of {user.username}")
+    release_clip_files(db, clips)
     for clip in clips:
-        if os.path.exists(clip.file_path):
-            print(f"removing {user.username} | {clip.file_path}")
-            os.remove(clip.file_path)
         cleanup_thumbnails(clip.id)
     
+    for upload_session in user.upload_sessions:
+        remove_session_file(upload_session.id)
+    
     if user.profile_picture:
         delete_profile_picture_file(user.profile_picture)
     
@@ -947,21 +1416,7 @@ def delete_user(user_id: int, current_user: User = Depends(require_admin), db: S
 
 @app.get("/api/admin/stats", response_model=AdminStats)
 def get_admin_stats(current_user: User = Depends(require_admin), db: Session = Depends(get_db)):
-     
-    total_users = db.query(User).count()
-    pending_users = db.query(User).filter(User.approved == False).count()
-    total_videos = db.query(Clip).count()
-    total_comments = db.query(Comment).count()
-    
-    return {
-        "total_users": total_users,
-        "pending_approvals": pending_users,
-        "approved_users": total_users - pending_users,
-        "total_videos": total_videos,
-        "total_comments": total_comments,
-        "admins": db.query(User).filter(User.role == UserRole.ADMIN).count(),
-        "moderators": db.query(User).filter(User.role == UserRole.MODERATOR).count()
-    }
+    return admin_stats_cache.get(db)
 
 @app.get("/api/feed", response_model=List[ClipResponse])
 def get_feed(
@@ -970,12 +1425,16 @@ def get_feed(
     current_user: User = Depends(require_approved),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Clip).join(User).filter(Clip.private == False)
+    query = db.query(Clip).join(User).options(contains_eager(Clip.user)).filter(
+        Clip.private == False,
+        Clip.file_state == FileState.PRESENT
+    )
     
     if cursor:
         query = query.filter(Clip.id < cursor)
     
     clips = query.order_by(Clip.id.desc()).limit(limit).all()
+    liked_ids = liked_clip_ids(db, current_user, clips)
     
     return [
         ClipResponse(
@@ -989,19 +1448,18 @@ def get_feed(
             uploaded_at=clip.uploaded_at,
             file_size=clip.file_size,
             duration=clip.duration,
+            width=clip.width,
+            height=clip.height,
             username=clip.user.username,
             likes=clip.likes,
-            user_has_liked=(
-                db.query(ClipLike).filter(
-                    ClipLike.clip_id == clip.id,
-                    ClipLike.user_id == current_user.id
-                ).first() is not None
-                if current_user else False
-            ),
-            private=clip.private
+            user_has_liked=clip.id in liked_ids,
+            private=clip.private,
+            processing_status=clip.processing_status,
+            hls_ready=clip.hls_ready,
+            storyboard_ready=clip.storyboard_ready,
+            playback_url=clip_playback_url(clip) if can_view_clip(clip, current_user) else None
         )
         for clip in clips
-        if os.path.exists(clip.file_path)
     ]
 
 BOT_USER_AGENTS = (
@@ -1035,6 +1493,9 @@ def clip_embed(clip_id: int, request: Request, db: Session = Depends(get_db)):
     clip_page_url = f"{FRONTEND_URL_PUBLIC}/clip/{clip_id}"
     title = html_lib.escape(clip.title)
     description = html_lib.escape(clip.description or f"Uploaded by {clip.user.username}")
+    video_width = clip.width or 1280
+    video_height = clip.height or 720
+    video_type = "video/webm" if clip.container == "webm" else video_media_type(clip.file_path)
 
     html = f"""<!DOCTYPE html>
 <html>
@@ -1051,16 +1512,16 @@ def clip_embed(clip_id: int, request: Request, db: Session = Depends(get_db)):
   <meta property="og:image:height" content="720">
   <meta property="og:video" content="{video_url}">
   <meta property="og:video:secure_url" content="{video_url}">
-  <meta property="og:video:type" content="video/mp4">
-  <meta property="og:video:width" content="1280">
-  <meta property="og:video:height" content="720">
+  <meta property="og:video:type" content="{video_type}">
+  <meta property="og:video:width" content="{video_width}">
+  <meta property="og:video:height" content="{video_height}">
   <meta name="twitter:card" content="player">
   <meta name="twitter:title" content="{title}">
   <meta name="twitter:description" content="{description}">
   <meta name="twitter:image" content="{thumbnail_url}">
   <meta name="twitter:player" content="{video_url}">
-  <meta name="twitter:player:width" content="1280">
-  <meta name="twitter:player:height" content="720">
+  <meta name="twitter:player:width" content="{video_width}">
+  <meta name="twitter:player:height" content="{video_height}">
 </head>
 <body>
   <a href="{clip_page_url}">{title}</a>
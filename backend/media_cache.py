@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from threading import Lock
+import os
+
+# Per-process budget; 0 turns the cache off. Each uvicorn worker holds its own copy.
+MEDIA_CACHE_BYTES = int(os.getenv("MEDIA_CACHE_BYTES", str(256 * 1024 * 1024)))
+# Leading bytes kept per file: players fetch the start (and the moov atom of faststart MP4s)
+# first, and most viewers of a burst never seek far. Files smaller than this are kept whole.
+MEDIA_CACHE_PREFIX_BYTES = int(os.getenv("MEDIA_CACHE_PREFIX_BYTES", str(16 * 1024 * 1024)))
+# A file is only read into memory once it has been requested this many times
+MEDIA_CACHE_ADMIT_AFTER = int(os.getenv("MEDIA_CACHE_ADMIT_AFTER", "2"))
+MEDIA_CACHE_TRACKED_KEYS = 10_000
+
+class ByteRangeCache:
+    """LRU cache of the leading bytes of hot media files, keyed by path and stat so replaced files miss."""
+
+    def __init__(self, max_bytes: int = MEDIA_CACHE_BYTES, prefix_bytes: int = MEDIA_CACHE_PREFIX_BYTES,
+                 admit_after: int = MEDIA_CACHE_ADMIT_AFTER):
+        self.max_bytes = max_bytes
+        self.prefix_bytes = min(prefix_bytes, max_bytes)
+        self.admit_after = admit_after
+        self.entries = OrderedDict()
+        self.request_counts = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_served = 0
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.prefix_bytes > 0
+
+    def read(self, path: str, stat_result: os.stat_result, start: int, end: int, partial: bool = False) -> bytes | None:
+        """
+        Bytes start..end (inclusive) of the file, or None when they are not cached. With partial,
+        whatever part of the range the cached prefix holds, for callers that read the rest from disk.
+        """
+        if not self.enabled:
+            return None
+        key = (os.fspath(path), stat_result.st_mtime_ns, stat_result.st_size)
+
+        with self._lock:
+            data = self.entries.get(key)
+            if data is not None and (end < len(data) or partial and start < len(data)):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.bytes_served += min(end + 1, len(data)) - start
+                return data[start:end + 1]
+
+            self.misses += 1
+            if data is not None or start >= self.prefix_bytes:
+                return None
+            count = self.request_counts.pop(key, 0) + 1
+            self.request_counts[key] = count
+            while len(self.request_counts) > MEDIA_CACHE_TRACKED_KEYS:
+                self.request_counts.popitem(last=False)
+            if count < self.admit_after:
+                return None
+
+        # Read outside the lock; a concurrent admit of the same file just wins the race
+        with open(path, "rb") as f:
+            data = f.read(self.prefix_bytes)
+        self._store(key, data)
+
+        if end < len(data) or partial and start < len(data):
+            return data[start:end + 1]
+        return None
+
+    def _store(self, key, data: bytes) -> None:
+        with self._lock:
+            if key in self.entries:
+                return
+            self.request_counts.pop(key, None)
+            # Entries for older versions of the same path can never hit again
+            for stale_key in [k for k in self.entries if k[0] == key[0]]:
+                self.size -= len(self.entries.pop(stale_key))
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.request_counts.clear()
+            self.size = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "max_bytes": self.max_bytes,
+                "prefix_bytes": self.prefix_bytes,
+                "size_bytes": self.size,
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes_served": self.bytes_served,
+            }
+
+media_cache = ByteRangeCache()
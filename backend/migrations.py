@@ -0,0 +1,223 @@
+"""
+Versioned schema changes for databases created before a column or index existed.
+
+create_all builds new databases straight from the models but never alters tables that already
+exist, so every column or index added to models.py also gets a migration here, as do the search
+indexes, which live outside the models. Steps are idempotent: on a database create_all has just
+built they do nothing and only record the version, and a migration interrupted halfway is simply
+run again. Indexes are built CONCURRENTLY on PostgreSQL, so the tables stay writable while they
+build. One process migrates at a time; app workers starting together wait for it.
+
+    python migrations.py            # apply pending migrations
+    python migrations.py status
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.schema import CreateColumn
+from database import Base, engine as default_engine
+from search_service import POSTGRES_CLIP_SEARCH_INDEXES, POSTGRES_USER_SEARCH_INDEXES, setup_clip_search, setup_user_search
+import models  # noqa: F401 - registers the tables on Base.metadata
+
+# Arbitrary key for the PostgreSQL advisory lock that keeps several app workers from migrating at once
+MIGRATION_LOCK_KEY = 7_240_113
+# How long a SQLite process waits for another one's migrations, in milliseconds
+SQLITE_MIGRATION_WAIT = 10 * 60 * 1000
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+def add_column(table: str, column: str):
+    """Add a column exactly as models.py declares it."""
+    def step(conn):
+        if column in {c["name"] for c in inspect(conn).get_columns(table)}:
+            return
+        model_column = Base.metadata.tables[table].c[column]
+        # PostgreSQL enum columns need their type first
+        if hasattr(model_column.type, "create"):
+            model_column.type.create(conn, checkfirst=True)
+        quote = conn.dialect.identifier_preparer.quote
+        conn.execute(text(f"ALTER TABLE {quote(table)} ADD COLUMN {CreateColumn(model_column).compile(dialect=conn.dialect)}"))
+    step.description = f"add column {table}.{column}"
+    return step
+
+def build_index(conn, name: str, table: str, definition: str, unique: bool = False) -> None:
+    """CREATE INDEX name ON table definition, without blocking writes on PostgreSQL."""
+    quote = conn.dialect.identifier_preparer.quote
+    concurrently = ""
+    if conn.dialect.name == "postgresql":
+        concurrently = "CONCURRENTLY "
+        # A concurrent build that failed leaves an invalid index behind that IF NOT EXISTS would keep
+        if conn.execute(text(
+            "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+        ), {"name": quote(name)}).scalar():
+            conn.execute(text(f"DROP INDEX CONCURRENTLY {quote(name)}"))
+    conn.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX {concurrently}IF NOT EXISTS {quote(name)} ON {quote(table)} {definition}"
+    ))
+
+def add_index(name: str):
+    """Build an index declared in models.py without blocking writes."""
+    def step(conn):
+        index = next(
+            index for table in Base.metadata.tables.values() for index in table.indexes if index.name == name
+        )
+        quote = conn.dialect.identifier_preparer.quote
+        columns = ", ".join(quote(column.name) for column in index.columns)
+        build_index(conn, name, index.table.name, f"({columns})", unique=index.unique)
+    step.description = f"add index {name}"
+    return step
+
+def add_postgres_index(name: str, table: str, definition: str, extension: str | None = None):
+    """An index only PostgreSQL has, skipped when the extension it needs could not be installed."""
+    def step(conn):
+        if conn.dialect.name != "postgresql":
+            return
+        if extension and not conn.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = :name"), {"name": extension}
+        ).first():
+            print(f"⚠️ Skipping index {name}: extension {extension} is not installed")
+            return
+        build_index(conn, name, table, definition)
+    step.description = f"add index {name} (PostgreSQL)"
+    return step
+
+def call(function, description: str):
+    """A step that is a function of the connection, for setup that differs per database."""
+    def step(conn):
+        function(conn)
+    step.description = description
+    return step
+
+# (version, name, steps); append only, never edit a migration that has shipped
+MIGRATIONS = [
+    (1, "clip processing state", [
+        add_column("clips", "content_hash"),
+        add_column("clips", "processing_status"),
+        add_column("clips", "hls_ready"),
+        add_column("clips", "storyboard_ready"),
+        add_column("clips", "faststart_remuxed"),
+        add_index("ix_clips_content_hash"),
+        add_index("ix_clips_file_path"),
+    ]),
+    (2, "clip media metadata", [
+        add_column("clips", "width"),
+        add_column("clips", "height"),
+        add_column("clips", "fps"),
+        add_column("clips", "video_codec"),
+        add_column("clips", "audio_codec"),
+        add_column("clips", "bitrate"),
+        add_column("clips", "container"),
+        add_column("clips", "keyframe_interval"),
+    ]),
+    (3, "clip file state and keyset pagination indexes", [
+        add_column("clips", "file_state"),
+        add_index("ix_clips_file_state"),
+        add_index("ix_comments_video_parent_created"),
+        add_index("ix_comments_parent_created"),
+        add_index("ix_clips_state_uploaded"),
+        add_index("ix_clips_user_state_uploaded"),
+    ]),
+    (4, "feed, comment and like lookup indexes", [
+        add_index("ix_clips_feed"),
+        add_index("ix_comments_video_created"),
+        add_index("ix_comments_commenter_id"),
+        add_index("ix_clip_likes_clip_id"),
+        add_index("ix_comment-likes_comment_id"),
+        add_index("ix_comment_dislikes_comment_id"),
+    ]),
+    (5, "clip full-text search", [
+        call(setup_clip_search, "create the clip search index (FTS5 table, or tsvector column and trigger)"),
+        *[add_postgres_index(name, table, definition) for name, (table, definition) in POSTGRES_CLIP_SEARCH_INDEXES.items()],
+    ]),
+    (6, "user substring search", [
+        call(setup_user_search, "create the user search index (FTS5 trigram table, or the pg_trgm extension)"),
+        *[add_postgres_index(name, table, definition, extension="pg_trgm")
+          for name, (table, definition) in POSTGRES_USER_SEARCH_INDEXES.items()],
+    ]),
+]
+
+def applied_versions(conn) -> set[int]:
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+@contextmanager
+def migration_lock(conn):
+    """Hold off every other process's migrations; they wait, then find nothing left to do."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        # Index builds and backfills on large tables run far longer than the app's statement timeout
+        conn.execute(text("SET statement_timeout = 0"))
+        try:
+            yield
+        finally:
+            # The connection goes back to the app's pool; requests must get their timeout back
+            conn.execute(text("RESET statement_timeout"))
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    elif conn.dialect.name == "sqlite":
+        # SQLite DDL is transactional: one write transaction both serializes and applies atomically
+        busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+        conn.exec_driver_sql(f"PRAGMA busy_timeout = {SQLITE_MIGRATION_WAIT}")
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+        finally:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {busy_timeout}")
+    else:
+        yield
+
+def run_migrations(engine=default_engine) -> list[int]:
+    """Create missing tables, apply every pending migration in order and return the versions applied."""
+    applied = []
+
+    # Autocommit: CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        with migration_lock(conn):
+            Base.metadata.create_all(conn)
+            migration_metadata.create_all(conn)
+            done = applied_versions(conn)
+            for version, name, steps in MIGRATIONS:
+                if version in done:
+                    continue
+                for step in steps:
+                    step(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=version, name=name, applied_at=datetime.now(timezone.utc)
+                ))
+                applied.append(version)
+                print(f"✅ Applied migration {version}: {name}")
+    return applied
+
+def print_status(engine=default_engine) -> None:
+    migration_metadata.create_all(engine)
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    for version, name, steps in MIGRATIONS:
+        print(f"{'✓' if version in done else '·'} {version}: {name}")
+        if version not in done:
+            for step in steps:
+                print(f"    {step.description}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply or list schema migrations")
+    parser.add_argument("command", nargs="?", choices=["apply", "status"], default="apply")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print_status()
+        return
+    if not run_migrations():
+        print("✓ Schema is up to date")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 from database import Base
-from sqlalchemy import Column, Integer, String, DateTime, BigInteger, ForeignKey, Boolean, UniqueConstraint, Enum as SQLEnum
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, BigInteger, ForeignKey, Boolean, UniqueConstraint, Index, JSON, Enum as SQLEnum
 from sqlalchemy.orm import relationship, backref
 from datetime import datetime, timezone
-from schemas import UserRole
+from schemas import UserRole, ProcessingStatus, JobStatus, FileState
 import enum
 class User(Base):
     __tablename__ = "users"
@@ -25,32 +25,56 @@ class User(Base):
     comment_likes = relationship("CommentLike", back_populates="user", cascade="all, delete-orphan")
     comment_dislikes = relationship("CommentDislike", back_populates="user", cascade="all, delete-orphan")
     clip_likes = relationship("ClipLike", back_populates="user", cascade="all, delete-orphan")
+    upload_sessions = relationship("UploadSession", back_populates="user", cascade="all, delete-orphan")
 class Clip(Base):
     __tablename__ = "clips"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     filename = Column(String, nullable=False)
-    file_path = Column(String, nullable=False)
+    file_path = Column(String, nullable=False, index=True)
+    content_hash = Column(String(64), nullable=True, index=True)
     thumbnail_path = Column(String, nullable=True)
     uploaded_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     file_size = Column(BigInteger, nullable=False)
     duration = Column(Integer)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    fps = Column(Float, nullable=True)
+    video_codec = Column(String, nullable=True)
+    audio_codec = Column(String, nullable=True)
+    bitrate = Column(BigInteger, nullable=True)
+    container = Column(String, nullable=True)
+    keyframe_interval = Column(Float, nullable=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
     likes = Column(Integer, default=0, nullable=False)
     private = Column(Boolean, default=False, nullable=False)
+    processing_status = Column(SQLEnum(ProcessingStatus), nullable=False, default=ProcessingStatus.PENDING, server_default="DONE")
+    # Whether the blob is on disk, kept up to date by reconcile_file_states so listings can filter in SQL
+    file_state = Column(SQLEnum(FileState), nullable=False, default=FileState.PRESENT, server_default="PRESENT", index=True)
+    hls_ready = Column(Boolean, nullable=False, default=False, server_default="0")
+    storyboard_ready = Column(Boolean, nullable=False, default=False, server_default="0")
+    faststart_remuxed = Column(Boolean, nullable=False, default=False, server_default="0")
     
     user = relationship("User", back_populates="clips")
     comments = relationship("Comment", back_populates="clip", cascade="all, delete-orphan")
     likes_relation = relationship("ClipLike", back_populates="clip", cascade="all, delete-orphan")
+    jobs = relationship("Job", back_populates="clip", cascade="all, delete-orphan")
+    
+    # Keyset pages of /api/clips, overall and per uploader, and of the feed are single index range scans
+    __table_args__ = (
+        Index("ix_clips_state_uploaded", "file_state", "uploaded_at", "id"),
+        Index("ix_clips_feed", "private", "file_state", "id"),
+        Index("ix_clips_user_state_uploaded", "user_id", "file_state", "uploaded_at", "id"),
+    )
     
 class Comment(Base):
     __tablename__ = "comments"
     
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(Integer, ForeignKey("clips.id"), nullable=False)
-    commenter_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    commenter_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     message = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     edited_at = Column(DateTime, nullable=True)
@@ -68,13 +92,21 @@ class Comment(Base):
     # Self-referential for replies
     parent = relationship("Comment", remote_side=[id], backref=backref("replies", cascade="all, delete-orphan"))
     
+    # Keyset pages of top-level comments and of one thread's replies are single index range scans
+    __table_args__ = (
+        Index("ix_comments_video_parent_created", "video_id", "parent_comment_id", "created_at", "id"),
+        Index("ix_comments_parent_created", "parent_comment_id", "created_at", "id"),
+        # The unpaged list of every comment on a clip
+        Index("ix_comments_video_created", "video_id", "created_at", "id"),
+    )
+    
 
 class CommentLike(Base):
     __tablename__ = "comment-likes"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=False)
+    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=False, index=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     __table_args__ = (
@@ -89,7 +121,7 @@ class CommentDislike(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=False)
+    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=False, index=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     __table_args__ = (
@@ -104,7 +136,7 @@ class ClipLike(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    clip_id = Column(Integer, ForeignKey("clips.id"), nullable=False)
+    clip_id = Column(Integer, ForeignKey("clips.id"), nullable=False, index=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     __table_args__ = (
@@ -113,4 +145,36 @@ class ClipLike(Base):
     
     user = relationship("User", back_populates="clip_likes")
     clip = relationship("Clip", back_populates="likes_relation")
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String, nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    post_to_discord = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    user = relationship("User", back_populates="upload_sessions")
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    clip_id = Column(Integer, ForeignKey("clips.id"), nullable=True, index=True)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime, nullable=True)
     
+    clip = relationship("Clip", back_populates="jobs")
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+import base64
+import json
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values) -> str:
+    """Opaque cursor holding the sort key of the last row on a page."""
+    encoded = [normalize_datetime(value).isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(encoded, separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong cursor length")
+        return tuple(
+            normalize_datetime(datetime.fromisoformat(value)) if value_type is datetime else value_type(value)
+            for value_type, value in zip(types, values)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def normalize_datetime(value: datetime) -> datetime:
+    # Columns are naive UTC in the database, so cursors compare against naive values
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def keyset_filter(columns: list, values: tuple, descending: bool):
+    """Rows strictly after the cursor in (columns) order; a row-value comparison the index can range scan."""
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+def paginate(query, columns: list, cursor_values: tuple | None, limit: int, response: Response,
+             descending: bool = True, skip: int = 0) -> list:
+    """
+    One page of a keyset-paginated query ordered by columns, the last of which must be unique.
+    The cursor for the following page goes in the X-Next-Cursor header, absent on the last page.
+    skip is a legacy offset for callers without a cursor.
+    """
+    if cursor_values is not None:
+        query = query.filter(keyset_filter(columns, cursor_values, descending))
+    order = [column.desc() if descending else column.asc() for column in columns]
+    query = query.order_by(*order)
+    if skip and cursor_values is None:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*(getattr(last, column.key) for column in columns))
+    return rows
@@ -9,6 +9,21 @@ class UserRole(str, Enum):
     USER = "user"
     GUEST = "guest"
 
+class ProcessingStatus(str, Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+class FileState(str, Enum):
+    PRESENT = "present"
+    MISSING = "missing"
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
 class UserCreate(BaseModel):
     username: str
     email: str
@@ -42,12 +57,18 @@ class ClipResponse(BaseModel):
     uploaded_at: datetime
     file_size: int
     duration: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
     username: str
     title: str
     description: Optional[str] = None
     likes: int
     user_has_liked: bool = False
     private: bool
+    processing_status: ProcessingStatus = ProcessingStatus.DONE
+    hls_ready: bool = False
+    storyboard_ready: bool = False
+    playback_url: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -65,6 +86,19 @@ class ClipUpload(BaseModel):
     title: str
     description: Optional[str] = None
     
+class UploadSessionCreate(BaseModel):
+    filename: str
+    file_size: int
+    title: str
+    description: Optional[str] = None
+    post_to_discord: bool = False
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    filename: str
+    file_size: int
+    offset: int
+    
 class CommentResponse(BaseModel):
     id: int
     video_id: int
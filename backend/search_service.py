@@ -0,0 +1,184 @@
+"""
+Full-text search over clip titles and descriptions, and substring search over users.
+
+SQLite gets external-content FTS5 tables kept in sync by triggers; PostgreSQL gets a tsvector
+column kept current by a trigger, and pg_trgm indexes. All are maintained by the database itself,
+so every write path (uploads, edits, deletes, admin tools) stays in sync without application hooks.
+They are created by migrations.py.
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, literal_column, select, text
+from sqlalchemy.orm import Query
+from models import Clip, User
+import re
+
+SEARCH_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+SEARCH_MAX_TERMS = 8
+# Title matches outrank description matches
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Not part of Base.metadata: create_all must not try to create them as regular tables
+search_metadata = MetaData()
+clips_fts = Table(
+    "clips_fts", search_metadata,
+    Column("rowid", Integer),
+    Column("title", String),
+    Column("description", String),
+    Column("clips_fts", String),
+)
+users_fts = Table(
+    "users_fts", search_metadata,
+    Column("rowid", Integer),
+    Column("username", String),
+    Column("email", String),
+    Column("users_fts", String),
+)
+TRIGRAM_MIN_LENGTH = 3
+
+def fts5_setup(name: str, table: str, columns: list[str], options: str) -> list[str]:
+    """External-content FTS5 table over table, kept in sync with it by triggers."""
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({column_list}, content='{table}', content_rowid='id', {options})",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {name}(rowid, {column_list}) VALUES (new.id, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {name}({name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {name}({name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {name}(rowid, {column_list}) VALUES (new.id, {new_values});
+        END""",
+        # Index the rows that existed before the table did
+        f"INSERT INTO {name}({name}) VALUES ('rebuild')",
+    ]
+
+SQLITE_INDEXES = {
+    "clips_fts": fts5_setup("clips_fts", "clips", ["title", "description"],
+                            "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"),
+    # Trigram tokens match any substring of three or more characters, like ILIKE '%term%'
+    "users_fts": fts5_setup("users_fts", "users", ["username", "email"], "tokenize='trigram'"),
+}
+
+def create_fts5_index(conn, name: str) -> None:
+    if conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": name}).first():
+        return
+    for statement in SQLITE_INDEXES[name]:
+        conn.execute(text(statement))
+    print(f"✅ Built search index {name} (FTS5)")
+
+def search_vector_sql(row: str = "") -> str:
+    return (
+        f"setweight(to_tsvector('simple', coalesce({row}title, '')), 'A') || "
+        f"setweight(to_tsvector('simple', coalesce({row}description, '')), 'B')"
+    )
+
+# A plain column kept current by a trigger rather than a generated one: adding it is a catalog
+# change, while a stored generated column rewrites the table under an exclusive lock
+POSTGRES_CLIP_SEARCH_SETUP = [
+    "ALTER TABLE clips ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""CREATE OR REPLACE FUNCTION clips_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {search_vector_sql("NEW.")};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    # One statement string, so there's no moment without the trigger
+    """DROP TRIGGER IF EXISTS clips_search_vector_update ON clips;
+    CREATE TRIGGER clips_search_vector_update BEFORE INSERT OR UPDATE OF title, description ON clips
+        FOR EACH ROW EXECUTE FUNCTION clips_search_vector_update()""",
+]
+# Existing rows are filled in id ranges, each its own short transaction
+SEARCH_BACKFILL_BATCH = 5000
+POSTGRES_CLIP_SEARCH_INDEXES = {
+    "ix_clips_search_vector": ("clips", "USING GIN (search_vector)"),
+}
+
+def setup_clip_search(conn) -> None:
+    """The clip full-text index for the running database; its GIN index is built separately."""
+    if conn.dialect.name == "sqlite":
+        create_fts5_index(conn, "clips_fts")
+    elif conn.dialect.name == "postgresql":
+        generated = conn.execute(text(
+            "SELECT is_generated FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = 'clips' AND column_name = 'search_vector'"
+        )).scalar()
+        if generated == "ALWAYS":
+            # Created as a generated column by an earlier release; the database already maintains it
+            return
+        for statement in POSTGRES_CLIP_SEARCH_SETUP:
+            conn.execute(text(statement))
+        last_id = conn.execute(text("SELECT coalesce(max(id), 0) FROM clips")).scalar()
+        for start in range(0, last_id, SEARCH_BACKFILL_BATCH):
+            conn.execute(text(
+                f"UPDATE clips SET search_vector = {search_vector_sql()} "
+                "WHERE id > :start AND id <= :end AND search_vector IS NULL"
+            ), {"start": start, "end": start + SEARCH_BACKFILL_BATCH})
+
+POSTGRES_USER_SEARCH_INDEXES = {
+    "ix_users_username_trgm": ("users", "USING GIN (username gin_trgm_ops)"),
+    "ix_users_email_trgm": ("users", "USING GIN (email gin_trgm_ops)"),
+}
+
+def setup_user_search(conn) -> None:
+    """The user substring index for the running database; PostgreSQL's trigram indexes are built separately."""
+    if conn.dialect.name == "sqlite":
+        create_fts5_index(conn, "users_fts")
+    elif conn.dialect.name == "postgresql":
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except Exception as e:
+            # Needs privileges the app role may not have; user search still works unindexed
+            print(f"⚠️ Could not set up pg_trgm for user search: {e}")
+
+def search_terms(search: str) -> list[str]:
+    # Words only: user input never reaches the FTS query syntax
+    return SEARCH_TERM_PATTERN.findall(search.lower())[:SEARCH_MAX_TERMS]
+
+def apply_search(query: Query, search: str) -> Query:
+    """
+    Restrict a Clip query to matches for every word of search, the last one also as a prefix so
+    results follow the user as they type, ordered best match first.
+    """
+    terms = search_terms(search)
+    if not terms:
+        return query.filter(False)
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+        rank = func.bm25(literal_column("clips_fts"), TITLE_WEIGHT, DESCRIPTION_WEIGHT)
+        matches = (
+            select(clips_fts.c.rowid.label("clip_id"), rank.label("rank"))
+            .where(clips_fts.c.clips_fts.op("MATCH")(match))
+            .subquery()
+        )
+        # bm25 is lower for better matches
+        return query.join(matches, matches.c.clip_id == Clip.id).order_by(matches.c.rank, Clip.id.desc())
+
+    if dialect == "postgresql":
+        ts_query = func.to_tsquery("simple", " & ".join(terms[:-1] + [f"{terms[-1]}:*"]))
+        search_vector = literal_column("clips.search_vector")
+        return query.filter(search_vector.op("@@")(ts_query)).order_by(
+            func.ts_rank_cd(search_vector, ts_query).desc(), Clip.id.desc()
+        )
+
+    for term in terms:
+        query = query.filter(Clip.title.ilike(f"%{term}%") | Clip.description.ilike(f"%{term}%"))
+    return query.order_by(Clip.uploaded_at.desc(), Clip.id.desc())
+
+def apply_user_search(query: Query, search: str) -> Query:
+    """Restrict a User query to usernames or emails containing search, as ILIKE '%search%' would."""
+    search = search.strip()
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == "sqlite" and len(search) >= TRIGRAM_MIN_LENGTH:
+        phrase = '"' + search.replace('"', '""') + '"'
+        matches = select(users_fts.c.rowid).where(users_fts.c.users_fts.op("MATCH")(phrase))
+        return query.filter(User.id.in_(matches))
+
+    # pg_trgm indexes serve these on PostgreSQL; terms too short for trigrams scan
+    return query.filter(User.username.ilike(f"%{search}%") | User.email.ilike(f"%{search}%"))
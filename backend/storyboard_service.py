@@ -0,0 +1,118 @@
+from pathlib import Path
+from uuid import uuid4
+import ffmpeg
+import math
+import os
+import re
+import shutil
+from ingest_service import media_dir
+
+STORYBOARD_INTERVAL = float(os.getenv("STORYBOARD_INTERVAL", "2"))
+STORYBOARD_MAX_FRAMES = 300
+STORYBOARD_TILE_SIZE = (160, 90)
+STORYBOARD_GRID = (10, 10)
+STORYBOARD_VTT = "storyboard.vtt"
+STORYBOARD_FILE_PATTERN = re.compile(r"^(storyboard\.vtt|sheet_\d{3,}\.jpg)$")
+
+def storyboard_dir(video_path: str) -> Path:
+    return media_dir(video_path) / "storyboard"
+
+def storyboard_file_path(video_path: str, name: str) -> Path | None:
+    if not STORYBOARD_FILE_PATTERN.match(name):
+        return None
+    return storyboard_dir(video_path) / name
+
+def storyboard_media_type(name: str) -> str:
+    return "text/vtt" if name.endswith(".vtt") else "image/jpeg"
+
+def storyboard_interval(duration: float) -> float:
+    """One frame every STORYBOARD_INTERVAL seconds, spaced out further on long clips to cap the sheet count."""
+    return max(STORYBOARD_INTERVAL, duration / STORYBOARD_MAX_FRAMES)
+
+def format_vtt_timestamp(seconds: float) -> str:
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+def write_storyboard_vtt(output_dir: Path, duration: float, interval: float, sheet_count: int) -> None:
+    tile_width, tile_height = STORYBOARD_TILE_SIZE
+    columns, rows = STORYBOARD_GRID
+    per_sheet = columns * rows
+    frame_count = min(math.ceil(duration / interval), sheet_count * per_sheet)
+
+    lines = ["WEBVTT", ""]
+    for frame in range(frame_count):
+        start = frame * interval
+        end = min(duration, start + interval)
+        sheet, position = divmod(frame, per_sheet)
+        row, column = divmod(position, columns)
+        lines.append(f"{format_vtt_timestamp(start)} --> {format_vtt_timestamp(end)}")
+        lines.append(f"sheet_{sheet + 1:03d}.jpg#xywh={column * tile_width},{row * tile_height},{tile_width},{tile_height}")
+        lines.append("")
+    (output_dir / STORYBOARD_VTT).write_text("\n".join(lines))
+
+def generate_storyboard(video_path: str, duration: float) -> bool:
+    """Tile one frame per interval into sprite sheets plus a WebVTT index mapping time ranges to tiles."""
+    target_dir = storyboard_dir(video_path)
+    if (target_dir / STORYBOARD_VTT).exists():
+        return True
+
+    tile_width, tile_height = STORYBOARD_TILE_SIZE
+    columns, rows = STORYBOARD_GRID
+    interval = storyboard_interval(duration)
+    work_dir = target_dir.parent / f"storyboard.tmp-{uuid4().hex}"
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        (
+            ffmpeg.input(video_path)
+            .video
+            .filter("fps", fps=f"1/{interval}")
+            .filter("scale", tile_width, tile_height, force_original_aspect_ratio="decrease")
+            .filter("pad", tile_width, tile_height, "(ow-iw)/2", "(oh-ih)/2")
+            .filter("tile", f"{columns}x{rows}")
+            .output(str(work_dir / "sheet_%03d.jpg"), f="image2", **{"q:v": 4})
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+        sheet_count = len(list(work_dir.glob("sheet_*.jpg")))
+        if not sheet_count:
+            raise RuntimeError("ffmpeg produced no sprite sheets")
+        write_storyboard_vtt(work_dir, duration, interval, sheet_count)
+
+        if target_dir.exists():
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            os.replace(work_dir, target_dir)
+        return True
+    except ffmpeg.Error as e:
+        print(f"ffmpeg error generating storyboard for {video_path}: {e.stderr.decode()}")
+    except Exception as e:
+        print(f"Failed to generate storyboard for {video_path}: {e}")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return False
+
+def process_and_store_storyboard(clip_id: int, video_path: str, duration: float | None = None) -> None:
+    """Job handler for "storyboard" jobs."""
+    from database import SessionLocal
+    from models import Clip
+
+    if not os.path.exists(video_path):
+        print(f"Skipping storyboard for clip {clip_id}: {video_path} no longer exists")
+        return
+
+    if not duration:
+        print(f"Skipping storyboard for clip {clip_id}: duration unknown")
+        return
+
+    if not generate_storyboard(video_path, duration):
+        raise RuntimeError(f"Storyboard generation failed for clip {clip_id}")
+
+    db = SessionLocal()
+    try:
+        db.query(Clip).filter(Clip.file_path == video_path).update({Clip.storyboard_ready: True}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
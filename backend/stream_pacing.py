@@ -0,0 +1,166 @@
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import os
+import time
+
+# Opt-in: pace progressive video downloads instead of sending them as fast as the client reads
+STREAM_PACING = os.getenv("STREAM_PACING", "").lower() in ("1", "true", "yes")
+# Paced rate relative to the clip's own bitrate, so playback never stalls on a healthy link
+STREAM_PACING_HEADROOM = float(os.getenv("STREAM_PACING_HEADROOM", "1.5"))
+# Seconds of playback sent at full speed before pacing starts, so players can fill their buffer
+STREAM_PACING_BURST_SECONDS = float(os.getenv("STREAM_PACING_BURST_SECONDS", "10"))
+# Bytes per second across all streams of the server, and per viewer; 0 means unlimited
+STREAM_EGRESS_LIMIT = int(os.getenv("STREAM_EGRESS_LIMIT", "0"))
+STREAM_USER_LIMIT = int(os.getenv("STREAM_USER_LIMIT", "0"))
+# uvicorn's worker count (it reads the same variable when --workers is not given). Pacing state is
+# per process, so each worker enforces its slice of both limits: the totals are never exceeded,
+# but a viewer whose streams all land on one worker only gets that worker's slice.
+SERVER_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+STREAM_CHUNK_SIZE = 64 * 1024
+# How far behind schedule a stream may fall before the missed time is forgotten, so a client that
+# stalled does not get to burst through the whole backlog afterwards
+STREAM_PACING_SLACK = 0.25
+
+def worker_share(limit: int) -> int:
+    return max(1, limit // SERVER_WORKERS) if limit else 0
+
+def fair_shares(demands: list[float | None], capacity: int) -> list[float | None]:
+    """Max-min fair split of capacity: nobody gets more than they ask for, the rest is shared evenly."""
+    if not capacity:
+        return list(demands)
+    shares = [0.0] * len(demands)
+    remaining = float(capacity)
+    order = sorted(range(len(demands)), key=lambda i: float("inf") if demands[i] is None else demands[i])
+    for position, index in enumerate(order):
+        even_share = remaining / (len(order) - position)
+        demand = demands[index]
+        shares[index] = even_share if demand is None else min(demand, even_share)
+        remaining -= shares[index]
+    return shares
+
+class PacedStream:
+    def __init__(self, key: str, bitrate: int | None):
+        self.key = key
+        self.target_rate = bitrate / 8 * STREAM_PACING_HEADROOM if bitrate else None
+        self.burst_bytes = bitrate / 8 * STREAM_PACING_BURST_SECONDS if bitrate else 0
+        self.bytes_sent = 0
+        self.rate = None
+        self.next_send = time.monotonic()
+        self.throttled = False
+
+    @property
+    def demand(self) -> float | None:
+        # Unlimited while bursting; the global and per-viewer caps still apply
+        return None if self.bytes_sent < self.burst_bytes else self.target_rate
+
+class StreamPacer:
+    """Tracks active streams on this process and hands each its share of this worker's egress."""
+
+    def __init__(self, egress_limit: int = worker_share(STREAM_EGRESS_LIMIT),
+                 user_limit: int = worker_share(STREAM_USER_LIMIT)):
+        self.egress_limit = egress_limit
+        self.user_limit = user_limit
+        self.streams = set()
+        self.streams_started = 0
+        self.streams_throttled = 0
+        self.bytes_sent = 0
+        self.throttled_seconds = 0.0
+
+    def open(self, key: str, bitrate: int | None) -> PacedStream:
+        stream = PacedStream(key, bitrate)
+        self.streams.add(stream)
+        self.streams_started += 1
+        self.allocate()
+        return stream
+
+    def close(self, stream: PacedStream) -> None:
+        if stream in self.streams:
+            self.streams.discard(stream)
+            self.allocate()
+
+    def allocate(self) -> None:
+        """Cap each viewer's streams at the per-viewer limit, then split the global limit across everyone."""
+        streams = list(self.streams)
+        demands = [stream.demand for stream in streams]
+
+        if self.user_limit:
+            by_key = {}
+            for index, stream in enumerate(streams):
+                by_key.setdefault(stream.key, []).append(index)
+            for indexes in by_key.values():
+                for index, share in zip(indexes, fair_shares([demands[i] for i in indexes], self.user_limit)):
+                    demands[index] = share
+
+        for stream, rate in zip(streams, fair_shares(demands, self.egress_limit)):
+            stream.rate = rate
+
+    async def wait(self, stream: PacedStream, chunk_size: int) -> None:
+        """Sleep until the stream may send its next chunk_size bytes."""
+        was_bursting = stream.demand is None and stream.target_rate is not None
+        stream.bytes_sent += chunk_size
+        self.bytes_sent += chunk_size
+        if was_bursting and stream.demand is not None:
+            self.allocate()
+
+        if not stream.rate:
+            return
+        now = time.monotonic()
+        stream.next_send = max(stream.next_send, now - STREAM_PACING_SLACK) + chunk_size / stream.rate
+        delay = stream.next_send - now
+        if delay > 0:
+            if not stream.throttled:
+                stream.throttled = True
+                self.streams_throttled += 1
+            self.throttled_seconds += delay
+            await asyncio.sleep(delay)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": STREAM_PACING,
+            "workers": SERVER_WORKERS,
+            "egress_limit": self.egress_limit,
+            "user_limit": self.user_limit,
+            "active_streams": len(self.streams),
+            "active_rate": round(sum(stream.rate or 0 for stream in self.streams)),
+            "unlimited_streams": sum(1 for stream in self.streams if not stream.rate),
+            "streams_started": self.streams_started,
+            "streams_throttled": self.streams_throttled,
+            "bytes_sent": self.bytes_sent,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+        }
+
+stream_pacer = StreamPacer()
+
+def paced_rate(bitrate: int | None) -> int | None:
+    """Per-connection rate for a proxy that can only limit single responses (nginx X-Accel-Limit-Rate)."""
+    return int(bitrate / 8 * STREAM_PACING_HEADROOM) if bitrate else None
+
+async def file_chunks(path: str, start: int, end: int, cached: bytes = b"", stream: PacedStream | None = None):
+    """
+    Bytes start..end of the file: cached, the leading part of the range already in memory, then
+    the rest from disk. Paced when stream is given.
+    """
+    try:
+        for offset in range(0, len(cached), STREAM_CHUNK_SIZE):
+            chunk = cached[offset:offset + STREAM_CHUNK_SIZE]
+            if stream:
+                await stream_pacer.wait(stream, len(chunk))
+            yield chunk
+        start += len(cached)
+        if start > end:
+            return
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await run_in_threadpool(f.read, min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                if stream:
+                    await stream_pacer.wait(stream, len(chunk))
+                yield chunk
+    finally:
+        if stream:
+            stream_pacer.close(stream)
@@ -0,0 +1,103 @@
+"""
+Shared fixtures. The app reads its configuration at import time, so the environment is set up
+here before anything from the backend is imported: a throwaway SQLite database and uploads
+directory per test run.
+
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+TEST_ROOT = tempfile.mkdtemp(prefix="clips-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_ROOT}/clips.db"
+os.environ["SECRET_KEY"] = "test-secret"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ.pop("MEDIA_OFFLOAD", None)
+os.environ.pop("STREAM_PACING", None)
+# UPLOAD_DIR is relative to the working directory
+os.chdir(TEST_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contextlib import contextmanager
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+import main
+from auth import hash_password
+from database import Base, SessionLocal, engine
+from ingest_service import OBJECTS_DIR
+from media_cache import media_cache
+from models import Clip, User
+from schemas import ProcessingStatus, UserRole
+
+# bcrypt is deliberately slow; every test user shares one hash
+PASSWORD_HASH = hash_password("password")
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    media_cache.clear()
+
+@pytest.fixture
+def make_user(db):
+    def make_user(username: str = "alice", role: UserRole = UserRole.USER) -> User:
+        user = User(username=username, email=f"{username}@example.com", password_hash=PASSWORD_HASH,
+                    role=role, approved=True)
+        db.add(user)
+        db.commit()
+        return user
+    return make_user
+
+@pytest.fixture
+def client_for(make_user):
+    """A TestClient logged in as a new approved user."""
+    def client_for(username: str = "alice", role: UserRole = UserRole.USER) -> TestClient:
+        make_user(username, role)
+        client = TestClient(main.app)
+        response = client.post("/api/login", data={"username": username, "password": "password"})
+        assert response.status_code == 200, response.text
+        return client
+    return client_for
+
+@pytest.fixture
+def make_clip(db):
+    """A processed clip with a small blob on disk."""
+    def make_clip(user: User, title: str = "clip", content: bytes = b"\x00" * 4096, **fields) -> Clip:
+        OBJECTS_DIR.mkdir(parents=True, exist_ok=True)
+        clip = Clip(user_id=user.id, filename="clip.mp4", file_path="", title=title, file_size=len(content),
+                    processing_status=ProcessingStatus.DONE, **fields)
+        db.add(clip)
+        db.flush()
+        clip.file_path = str(OBJECTS_DIR / f"clip-{clip.id}.mp4")
+        with open(clip.file_path, "wb") as f:
+            f.write(content)
+        db.commit()
+        return clip
+    return make_clip
+
+@contextmanager
+def recorded_statements():
+    """Every SQL statement the app runs inside the block, as (statement, parameters)."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
@@ -0,0 +1,43 @@
+import main
+from models import Comment
+from pagination import NEXT_CURSOR_HEADER
+
+def add_comments(db, clip, user, count: int, parent: Comment | None = None) -> list[Comment]:
+    comments = [
+        Comment(video_id=clip.id, commenter_id=user.id, message=f"comment {i}",
+                parent_comment_id=parent.id if parent else None)
+        for i in range(count)
+    ]
+    db.add_all(comments)
+    db.commit()
+    return comments
+
+def test_comments_default_to_the_first_page_of_top_level_comments(db, client_for, make_user, make_clip):
+    client = client_for("bob")
+    user = make_user("carol")
+    clip = make_clip(user)
+    comments = add_comments(db, clip, user, main.COMMENT_PAGE_SIZE + 5)
+    add_comments(db, clip, user, 3, parent=comments[0])
+
+    first = client.get(f"/api/clips/{clip.id}/comments")
+    rest = client.get(f"/api/clips/{clip.id}/comments", params={"cursor": first.headers[NEXT_CURSOR_HEADER]})
+
+    assert len(first.json()) == main.COMMENT_PAGE_SIZE
+    assert NEXT_CURSOR_HEADER not in rest.headers
+    pages = first.json() + rest.json()
+    assert [comment["id"] for comment in pages] == [comment.id for comment in reversed(comments)]
+    assert pages[-1]["reply_count"] == 3
+
+def test_replies_are_paged_oldest_first(db, client_for, make_user, make_clip):
+    client = client_for("bob")
+    user = make_user("carol")
+    clip = make_clip(user)
+    parent = add_comments(db, clip, user, 1)[0]
+    replies = add_comments(db, clip, user, 5, parent=parent)
+
+    first = client.get(f"/api/comments/{parent.id}/replies", params={"limit": 3})
+    rest = client.get(f"/api/comments/{parent.id}/replies",
+                      params={"limit": 3, "cursor": first.headers[NEXT_CURSOR_HEADER]})
+
+    assert NEXT_CURSOR_HEADER not in rest.headers
+    assert [reply["id"] for reply in first.json() + rest.json()] == [reply.id for reply in replies]
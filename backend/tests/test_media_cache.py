@@ -0,0 +1,52 @@
+import os
+import pytest
+from media_cache import media_cache
+
+CONTENT = os.urandom(300 * 1024)
+PREFIX = 100 * 1024
+
+@pytest.fixture
+def small_prefix(monkeypatch):
+    # Clips are usually larger than the cached prefix
+    monkeypatch.setattr(media_cache, "prefix_bytes", PREFIX)
+
+def test_open_ended_ranges_hit_the_cached_prefix(small_prefix, client_for, make_user, make_clip):
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"), content=CONTENT)
+
+    responses = [client.get(f"/api/clips/{clip.id}/video", headers={"Range": "bytes=0-"}) for _ in range(4)]
+
+    for response in responses:
+        assert response.status_code == 206
+        assert response.headers["content-length"] == str(len(CONTENT))
+        assert response.content == CONTENT
+    # The first request only counts the clip; the second reads the prefix in and serves from it
+    assert media_cache.hits == 2
+    assert media_cache.bytes_served == 2 * PREFIX
+
+def test_open_ended_range_inside_the_prefix_continues_from_disk(small_prefix, client_for, make_user, make_clip):
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"), content=CONTENT)
+    for _ in range(2):
+        client.get(f"/api/clips/{clip.id}/video", headers={"Range": "bytes=0-"})
+    hits = media_cache.hits
+
+    response = client.get(f"/api/clips/{clip.id}/video", headers={"Range": "bytes=50000-"})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 50000-{len(CONTENT) - 1}/{len(CONTENT)}"
+    assert response.content == CONTENT[50000:]
+    assert media_cache.hits == hits + 1
+
+def test_open_ended_range_past_the_prefix_is_read_from_disk(small_prefix, client_for, make_user, make_clip):
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"), content=CONTENT)
+    for _ in range(2):
+        client.get(f"/api/clips/{clip.id}/video", headers={"Range": "bytes=0-"})
+    hits = media_cache.hits
+
+    response = client.get(f"/api/clips/{clip.id}/video", headers={"Range": f"bytes={PREFIX + 1000}-"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[PREFIX + 1000:]
+    assert media_cache.hits == hits
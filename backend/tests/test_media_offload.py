@@ -0,0 +1,67 @@
+import os
+import pytest
+import delivery_service
+from ingest_service import UPLOAD_DIR
+from models import User
+
+@pytest.fixture(params=["x-accel-redirect", "x-sendfile"])
+def offload_mode(request, monkeypatch):
+    monkeypatch.setattr(delivery_service, "MEDIA_OFFLOAD", request.param)
+    return request.param
+
+def expected_redirect(mode: str, file_path: str) -> tuple[str, str]:
+    if mode == "x-accel-redirect":
+        relative_path = os.path.relpath(os.path.abspath(file_path), os.path.abspath(UPLOAD_DIR))
+        return "x-accel-redirect", delivery_service.MEDIA_OFFLOAD_PREFIX + relative_path
+    return "x-sendfile", os.path.abspath(file_path)
+
+def test_offloaded_video_carries_only_headers(offload_mode, client_for, make_user, make_clip):
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"))
+
+    response = client.get(f"/api/clips/{clip.id}/video")
+
+    header, location = expected_redirect(offload_mode, clip.file_path)
+    assert response.status_code == 200
+    assert response.headers[header] == location
+    assert response.headers["content-type"] == "video/mp4"
+    assert response.headers["cache-control"] == delivery_service.cache_control(private=False, final=True)
+    assert response.headers["etag"]
+    assert response.content == b""
+
+def test_offloaded_private_video_is_not_shared_cacheable(offload_mode, client_for, db, make_clip):
+    client = client_for("bob")
+    owner = db.query(User).filter_by(username="bob").one()
+    clip = make_clip(owner, private=True)
+
+    response = client.get(f"/api/clips/{clip.id}/video")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.content == b""
+
+def test_offloaded_video_revalidates_with_304(offload_mode, client_for, make_user, make_clip):
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"))
+    etag = client.get(f"/api/clips/{clip.id}/video").headers["etag"]
+
+    response = client.get(f"/api/clips/{clip.id}/video", headers={"If-None-Match": etag})
+
+    header, _ = expected_redirect(offload_mode, clip.file_path)
+    assert response.status_code == 304
+    assert header not in response.headers
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+def test_signed_playback_url_is_offloaded(offload_mode, client_for, make_user, make_clip):
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"))
+    playback_url = client.get(f"/api/clips/{clip.id}").json()["playback_url"]
+
+    response = client.get(playback_url)
+
+    header, location = expected_redirect(offload_mode, clip.file_path)
+    assert response.status_code == 200
+    assert response.headers[header] == location
+    assert response.headers["content-type"] == "video/mp4"
+    assert response.content == b""
@@ -0,0 +1,16 @@
+from sqlalchemy import create_engine
+from database import engine
+from migrations import run_migrations
+
+def test_migrations_leave_the_pooled_connection_as_they_found_it():
+    # One pooled connection, so the migrations and the check below share it
+    single = create_engine(engine.url, pool_size=1, max_overflow=0)
+    with single.connect() as conn:
+        busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+
+    assert run_migrations(single) == []
+
+    # The migration wait must not carry over to the requests that reuse this connection
+    with single.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == busy_timeout
+    single.dispose()
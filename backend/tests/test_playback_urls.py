@@ -0,0 +1,35 @@
+import pytest
+from delivery_service import playback_token
+
+def test_playback_url_streams_the_clip(client_for, make_user, make_clip):
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"), content=b"video bytes")
+    playback_url = client.get(f"/api/clips/{clip.id}").json()["playback_url"]
+
+    response = client.get(playback_url)
+
+    assert response.status_code == 200
+    assert response.content == b"video bytes"
+
+@pytest.mark.parametrize("token", [
+    "YQ.%C3%A9",
+    "not-a-token",
+    "YQ.",
+    "%C3%A9.%C3%A9",
+])
+def test_malformed_tokens_are_forbidden(client_for, token):
+    client = client_for("bob")
+
+    response = client.get(f"/api/play/{token}/video")
+
+    assert response.status_code == 403
+
+def test_tampered_token_is_forbidden(client_for, make_user, make_clip):
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"))
+    payload, signature = playback_token(clip).split(".")
+    tampered = signature[:-1] + ("B" if signature[-1] == "A" else "A")
+
+    response = client.get(f"/api/play/{payload}.{tampered}/video")
+
+    assert response.status_code == 403
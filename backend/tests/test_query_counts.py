@@ -0,0 +1,31 @@
+import pytest
+from models import ClipLike, User
+from conftest import recorded_statements
+
+def seed_clips(db, make_user, make_clip, first: int, count: int) -> None:
+    viewer = db.query(User).filter_by(username="viewer").one()
+    for i in range(first, first + count):
+        # Every clip from a different uploader, half of them liked, so nothing is served from one row
+        clip = make_clip(make_user(f"uploader{i}"), title=f"clip {i}")
+        if i % 2:
+            db.add(ClipLike(user_id=viewer.id, clip_id=clip.id))
+    db.commit()
+
+def statement_count(client, url: str, expected_rows: int) -> int:
+    with recorded_statements() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == expected_rows
+    return len(statements)
+
+@pytest.mark.parametrize("url", ["/api/clips?limit=100", "/api/feed?limit=100"])
+def test_clip_listings_run_a_constant_number_of_statements(url, db, client_for, make_user, make_clip):
+    client = client_for("viewer")
+
+    seed_clips(db, make_user, make_clip, 0, 3)
+    few = statement_count(client, url, 3)
+
+    seed_clips(db, make_user, make_clip, 3, 27)
+    many = statement_count(client, url, 30)
+
+    assert few == many
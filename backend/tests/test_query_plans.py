@@ -0,0 +1,116 @@
+"""
+The hot queries stay served by indexes, so a model or query change that drops one fails here
+before it reaches a large table. Each request goes through the real endpoint; every statement it
+runs is recorded and replayed through EXPLAIN QUERY PLAN with its own parameters.
+"""
+import pytest
+from database import engine
+from models import ClipLike, Comment, CommentDislike, CommentLike
+from pagination import encode_cursor
+from schemas import UserRole
+from conftest import recorded_statements
+
+HOT_READS = [
+    "/api/feed",
+    "/api/feed?cursor={clip}",
+    "/api/clips?limit=2",
+    "/api/clips?limit=2&cursor={clip_cursor}",
+    "/api/clips?user_id={uploader}&limit=2",
+    "/api/clips?user_id={uploader}&limit=2&cursor={clip_cursor}",
+    "/api/clips/{clip}/comments",
+    "/api/clips/{clip}/comments?limit=1",
+    "/api/clips/{clip}/comments?limit=1&cursor={newer_comment_cursor}",
+    "/api/comments/{comment}/replies?limit=1",
+    "/api/comments/{comment}/replies?limit=1&cursor={older_comment_cursor}",
+    "/api/admin/users?search=upload",
+]
+
+# Relevance has no index to read in order, so these sort their matches; they must not scan for them
+RANKED_SEARCHES = [
+    "/api/clips?search=clip",
+    "/api/clips?search=clip&user_id={uploader}",
+]
+
+# Deletes load every dependent row to cascade it
+CASCADING_DELETES = [
+    "/api/clips/{clip}",
+    "/api/admin/users/{uploader}",
+]
+
+def plan_problems(statement: str, parameters, sorted_results: bool) -> list[str]:
+    with engine.connect() as conn:
+        plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    problems = []
+    for step in plan:
+        # Every hot query has an equality prefix to SEARCH on; SCAN walks a whole table or index.
+        # FTS5 tables are always SCANned and answer the MATCH from their own index.
+        if step.startswith("SCAN ") and "VIRTUAL TABLE" not in step:
+            problems.append(step)
+        elif step.startswith("USE TEMP B-TREE FOR ORDER BY") and not sorted_results:
+            problems.append(step)
+    return problems
+
+def assert_index_served(statements: list, sorted_results: bool = False) -> None:
+    problems = {}
+    for statement, parameters in statements:
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            problems.update({step: " ".join(statement.split()) for step in plan_problems(statement, parameters, sorted_results)})
+    assert statements
+    assert not problems, problems
+
+@pytest.fixture
+def seeded(db, make_user, make_clip):
+    """Clips from two users, each with a comment thread and likes and dislikes throughout."""
+    viewer = make_user("viewer")
+    uploader = make_user("uploader")
+    for i, user in enumerate([viewer, uploader] * 3):
+        clip = make_clip(user, title=f"clip {i}")
+        db.add(ClipLike(user_id=viewer.id, clip_id=clip.id))
+        comment = Comment(video_id=clip.id, commenter_id=uploader.id, message="first")
+        db.add(comment)
+        db.flush()
+        reply = Comment(video_id=clip.id, commenter_id=viewer.id, message="reply", parent_comment_id=comment.id)
+        db.add(reply)
+        db.add(CommentLike(user_id=viewer.id, comment_id=comment.id))
+        db.add(CommentDislike(user_id=uploader.id, comment_id=comment.id))
+    db.commit()
+    return {
+        "clip": clip.id,
+        "comment": comment.id,
+        "uploader": uploader.id,
+        "clip_cursor": encode_cursor(clip.uploaded_at, clip.id),
+        "newer_comment_cursor": encode_cursor(reply.created_at, reply.id),
+        "older_comment_cursor": encode_cursor(comment.created_at, comment.id),
+    }
+
+@pytest.mark.parametrize("url", HOT_READS)
+def test_hot_reads_are_index_served(url, seeded, client_for):
+    client = client_for("admin", UserRole.ADMIN)
+
+    with recorded_statements() as statements:
+        response = client.get(url.format(**seeded))
+
+    assert response.status_code == 200, response.text
+    assert response.json()
+    assert_index_served(statements)
+
+@pytest.mark.parametrize("url", RANKED_SEARCHES)
+def test_ranked_searches_are_index_served(url, seeded, client_for):
+    client = client_for("admin", UserRole.ADMIN)
+
+    with recorded_statements() as statements:
+        response = client.get(url.format(**seeded))
+
+    assert response.status_code == 200, response.text
+    assert response.json()
+    assert_index_served(statements, sorted_results=True)
+
+@pytest.mark.parametrize("url", CASCADING_DELETES)
+def test_cascading_deletes_are_index_served(url, seeded, client_for):
+    client = client_for("admin", UserRole.ADMIN)
+
+    with recorded_statements() as statements:
+        response = client.delete(url.format(**seeded))
+
+    assert response.status_code in (200, 204), response.text
+    assert_index_served(statements)
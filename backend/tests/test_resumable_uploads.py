@@ -0,0 +1,139 @@
+import pytest
+from ingest_service import lock_session_part, session_part_path
+from models import Clip, UploadSession
+
+CONTENT = bytes(range(256)) * 40
+
+def start_upload(client, content: bytes = CONTENT) -> str:
+    response = client.post("/api/clips/uploads", json={
+        "filename": "clip.mp4", "file_size": len(content), "title": "resumed"
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+def put_chunk(client, upload_id: str, start: int, body: bytes, end: int | None = None, total: int = len(CONTENT)):
+    end = start + len(body) - 1 if end is None else end
+    return client.put(f"/api/clips/uploads/{upload_id}", content=body,
+                      headers={"Content-Range": f"bytes {start}-{end}/{total}"})
+
+@pytest.fixture
+def held_lock():
+    """Holds an upload's part file the way an in-flight request does."""
+    parts = []
+
+    def hold(upload_id: str):
+        part = lock_session_part(upload_id)
+        assert part is not None
+        parts.append(part)
+
+    yield hold
+    for part in parts:
+        part.close()
+
+def test_upload_resumes_and_completes(db, client_for):
+    client = client_for("bob")
+    upload_id = start_upload(client)
+
+    assert put_chunk(client, upload_id, 0, CONTENT[:4000]).json()["offset"] == 4000
+    assert client.get(f"/api/clips/uploads/{upload_id}").json()["offset"] == 4000
+    assert put_chunk(client, upload_id, 4000, CONTENT[4000:]).json()["offset"] == len(CONTENT)
+
+    response = client.post(f"/api/clips/uploads/{upload_id}/complete")
+
+    assert response.status_code == 200, response.text
+    clip = db.get(Clip, response.json()["id"])
+    with open(clip.file_path, "rb") as f:
+        assert f.read() == CONTENT
+    assert db.get(UploadSession, upload_id) is None
+    assert not session_part_path(upload_id).exists()
+
+def test_chunk_at_the_wrong_offset_is_a_conflict(client_for):
+    client = client_for("bob")
+    upload_id = start_upload(client)
+    put_chunk(client, upload_id, 0, CONTENT[:1000])
+
+    # A retry of a chunk that already landed, and one that skips ahead
+    for start in (0, 2000):
+        response = put_chunk(client, upload_id, start, CONTENT[start:start + 1000])
+
+        assert response.status_code == 409
+        assert response.headers["upload-offset"] == "1000"
+    assert session_part_path(upload_id).read_bytes() == CONTENT[:1000]
+
+def test_chunk_while_another_request_holds_the_upload_is_a_conflict(client_for, held_lock):
+    client = client_for("bob")
+    upload_id = start_upload(client)
+    put_chunk(client, upload_id, 0, CONTENT[:1000])
+    held_lock(upload_id)
+
+    response = put_chunk(client, upload_id, 1000, CONTENT[1000:2000])
+
+    assert response.status_code == 409
+    assert response.headers["upload-offset"] == "1000"
+    assert session_part_path(upload_id).read_bytes() == CONTENT[:1000]
+
+def test_complete_while_another_request_holds_the_upload_is_a_conflict(db, client_for, held_lock):
+    client = client_for("bob")
+    upload_id = start_upload(client)
+    put_chunk(client, upload_id, 0, CONTENT)
+    held_lock(upload_id)
+
+    response = client.post(f"/api/clips/uploads/{upload_id}/complete")
+
+    assert response.status_code == 409
+    assert db.query(Clip).count() == 0
+
+def test_chunk_longer_than_its_range_is_rejected(client_for):
+    client = client_for("bob")
+    upload_id = start_upload(client)
+
+    response = put_chunk(client, upload_id, 0, CONTENT[:1000], end=499)
+
+    assert response.status_code == 400
+    assert session_part_path(upload_id).read_bytes() == b""
+
+def test_chunk_shorter_than_its_range_reports_where_to_resume(client_for):
+    client = client_for("bob")
+    upload_id = start_upload(client)
+
+    response = put_chunk(client, upload_id, 0, CONTENT[:600], end=999)
+
+    assert response.status_code == 400
+    assert response.headers["upload-offset"] == "600"
+    assert put_chunk(client, upload_id, 600, CONTENT[600:]).status_code == 200
+
+def test_incomplete_upload_cannot_complete(db, client_for):
+    client = client_for("bob")
+    upload_id = start_upload(client)
+    put_chunk(client, upload_id, 0, CONTENT[:1000])
+
+    response = client.post(f"/api/clips/uploads/{upload_id}/complete")
+
+    assert response.status_code == 409
+    assert response.headers["upload-offset"] == "1000"
+    assert db.query(Clip).count() == 0
+    assert db.get(UploadSession, upload_id) is not None
+
+def test_upload_completes_only_once(db, client_for):
+    client = client_for("bob")
+    upload_id = start_upload(client)
+    put_chunk(client, upload_id, 0, CONTENT)
+    assert client.post(f"/api/clips/uploads/{upload_id}/complete").status_code == 200
+
+    response = client.post(f"/api/clips/uploads/{upload_id}/complete")
+
+    assert response.status_code == 404
+    assert db.query(Clip).count() == 1
+
+def test_another_users_upload_is_not_found(db, client_for):
+    owner = client_for("bob")
+    upload_id = start_upload(owner)
+    put_chunk(owner, upload_id, 0, CONTENT[:1000])
+    other = client_for("mallory")
+
+    assert other.get(f"/api/clips/uploads/{upload_id}").status_code == 404
+    assert put_chunk(other, upload_id, 1000, CONTENT[1000:2000]).status_code == 404
+    assert other.post(f"/api/clips/uploads/{upload_id}/complete").status_code == 404
+    assert other.delete(f"/api/clips/uploads/{upload_id}").status_code == 404
+    assert session_part_path(upload_id).read_bytes() == CONTENT[:1000]
+    assert db.get(UploadSession, upload_id) is not None
@@ -0,0 +1,46 @@
+import os
+import pytest
+import delivery_service
+import stream_pacing
+from media_cache import media_cache
+
+@pytest.fixture
+def pacing(monkeypatch):
+    monkeypatch.setattr(delivery_service, "STREAM_PACING", True)
+    monkeypatch.setattr(media_cache, "admit_after", 1)
+
+CONTENT = os.urandom(300 * 1024)
+
+def test_paced_stream_serves_the_cached_prefix(pacing, client_for, make_user, make_clip):
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"), content=CONTENT)
+
+    first = client.get(f"/api/clips/{clip.id}/video")
+    hits = media_cache.hits
+    second = client.get(f"/api/clips/{clip.id}/video", headers={"Range": "bytes=1000-"})
+
+    assert first.content == CONTENT
+    assert second.status_code == 206
+    assert second.content == CONTENT[1000:]
+    assert media_cache.hits == hits + 1
+
+def test_paced_range_past_the_prefix_continues_from_disk(pacing, monkeypatch, client_for, make_user, make_clip):
+    monkeypatch.setattr(media_cache, "prefix_bytes", 100 * 1024)
+    client = client_for("bob")
+    clip = make_clip(make_user("carol"), content=CONTENT)
+    client.get(f"/api/clips/{clip.id}/video", headers={"Range": "bytes=0-99"})
+    bytes_served = media_cache.bytes_served
+
+    response = client.get(f"/api/clips/{clip.id}/video", headers={"Range": "bytes=50000-250000"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[50000:250001]
+    assert media_cache.bytes_served == bytes_served + 100 * 1024 - 50000
+
+def test_limits_are_split_across_server_workers(monkeypatch):
+    monkeypatch.setattr(stream_pacing, "SERVER_WORKERS", 4)
+
+    assert stream_pacing.worker_share(8_000_000) == 2_000_000
+    # Unlimited stays unlimited, and a tiny limit never rounds down to it
+    assert stream_pacing.worker_share(0) == 0
+    assert stream_pacing.worker_share(3) == 1
@@ -0,0 +1,13 @@
+import thumbnail_service
+from models import Clip
+
+def test_thumbnail_job_stores_the_path_outside_a_request(monkeypatch, db, make_user, make_clip):
+    # Job handlers run in the worker, where there is no request to pick a database session from
+    clip = make_clip(make_user("carol"))
+    monkeypatch.setattr(thumbnail_service, "generate_thumbnails",
+                        lambda video_path, clip_id, duration: f"thumbnails/{clip_id}_md.jpg")
+
+    thumbnail_service.process_and_store_thumbnail(clip.id, clip.file_path)
+
+    db.expire_all()
+    assert db.get(Clip, clip.id).thumbnail_path == f"thumbnails/{clip.id}_md.jpg"
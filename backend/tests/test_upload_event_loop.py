@@ -0,0 +1,49 @@
+import asyncio
+from contextlib import contextmanager
+from sqlalchemy import event
+from database import engine
+
+CONTENT = b"\x00" * 5000
+
+@contextmanager
+def statements_on_event_loop():
+    """Statements run on the event loop thread, where waiting on the pool would stall every request."""
+    on_loop = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        on_loop.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield on_loop
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+def test_form_upload_runs_queries_off_the_event_loop(client_for):
+    client = client_for("bob")
+
+    with statements_on_event_loop() as on_loop:
+        response = client.post("/api/clips/upload", data={"title": "form upload"},
+                               files={"file": ("clip.mp4", CONTENT, "video/mp4")})
+
+    assert response.status_code == 200, response.text
+    assert on_loop == []
+
+def test_resumable_upload_runs_queries_off_the_event_loop(client_for):
+    client = client_for("bob")
+    upload_id = client.post("/api/clips/uploads", json={
+        "filename": "clip.mp4", "file_size": len(CONTENT), "title": "resumed"
+    }).json()["id"]
+
+    with statements_on_event_loop() as on_loop:
+        chunk = client.put(f"/api/clips/uploads/{upload_id}", content=CONTENT,
+                           headers={"Content-Range": f"bytes 0-{len(CONTENT) - 1}/{len(CONTENT)}"})
+        complete = client.post(f"/api/clips/uploads/{upload_id}/complete")
+
+    assert chunk.status_code == 200, chunk.text
+    assert complete.status_code == 200, complete.text
+    assert on_loop == []
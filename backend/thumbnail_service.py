@@ -1,7 +1,7 @@
-from PIL import Image
 from pathlib import Path
 import ffmpeg
 import os
+import shutil
 from discord_utils import send_discord_notification
 
 THUMBNAIL_DIR = Path("uploads/thumbnails")
@@ -13,56 +13,44 @@ THUMBNAIL_SIZES = {
     "lg": (1280, 720),
 }
 
-def extract_frame(video_path: str, output_path: str, timestamp: float = 1.0):
-    
-    try:
-        (
-            ffmpeg.input(video_path, ss=timestamp)
-            .output(output_path, vframes=1, f="image2")
-            .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True)
-        )
-        return os.path.exists(output_path)
-    except ffmpeg.Error as e:
-        print(f"ffmpeg error extracting frame: {e.stderr.decode()}")
-        return False
-    
-def resize_frame(input_path: str, output_path: str, size: tuple[int, int]) -> None:
-    img = Image.open(input_path)
-    
-    if img.mode == "RGBA":
-        img = img.convert("RGB")
-    
-    img.thumbnail(size, Image.Resampling.LANCZOS)
-    img.save(output_path, format="JPEG", optimize=True, quality=85)
-    
+def thumbnail_timestamp(duration: float | None) -> float:
+    if not duration:
+        return 0.0
+    return min(1.0, duration * 0.1)
 
-def generate_thumbnails(video_path: str, clip_id: int) -> str | None:
-    
+def generate_thumbnails(video_path: str, clip_id: int, duration: float | None = None) -> str | None:
+    """
+    Decode a single frame and emit every THUMBNAIL_SIZES variant from one ffmpeg run
+    (split -> scale per size). `duration` comes from the probe done at ingest, so the
+    video is not probed again here.
+    """
     base_name = f"{clip_id}"
-    raw_frame_path = str(THUMBNAIL_DIR / f"{base_name}_raw.jpg")
     
-    try:
-        probe = ffmpeg.probe(video_path)
-        duration = float(probe["format"]["duration"])
-        timestamp = min(1.0, duration * 0.1)
-    except Exception:
-        timestamp = 0.0
+    frame = ffmpeg.input(video_path, ss=thumbnail_timestamp(duration)).video
+    branches = frame.filter_multi_output("split", len(THUMBNAIL_SIZES))
+    
+    outputs = []
+    for index, (label, (width, height)) in enumerate(THUMBNAIL_SIZES.items()):
+        variant_path = str(THUMBNAIL_DIR / f"{base_name}_thumb_{label}.jpg")
+        # Fit inside the box without upscaling, like PIL's Image.thumbnail
+        scaled = branches[index].filter(
+            "scale", f"min({width},iw)", f"min({height},ih)", force_original_aspect_ratio="decrease"
+        )
+        outputs.append(scaled.output(variant_path, vframes=1, f="image2", update=1, **{"q:v": 3}))
     
-    if not extract_frame(video_path, raw_frame_path, timestamp):
-        print(f"Failed to extract frame from {video_path}")
+    try:
+        ffmpeg.merge_outputs(*outputs).overwrite_output().run(capture_stdout=True, capture_stderr=True)
+    except ffmpeg.Error as e:
+        print(f"ffmpeg error generating thumbnails: {e.stderr.decode()}")
+        cleanup_thumbnails(clip_id)
         return None
     
-    for label, size in THUMBNAIL_SIZES.items():
-        variant_path = str(THUMBNAIL_DIR / f"{base_name}_thumb_{label}.jpg")
-        try:
-            resize_frame(raw_frame_path, variant_path, size)
-        except Exception as e:
-            print(f"Failed to generate {label} thumbnail: {e}")
+    for label in THUMBNAIL_SIZES:
+        if not (THUMBNAIL_DIR / f"{base_name}_thumb_{label}.jpg").exists():
+            print(f"Failed to generate {label} thumbnail for clip {clip_id}")
             cleanup_thumbnails(clip_id)
             return None
-
-    os.remove(raw_frame_path)
+    
     return f"uploads/thumbnails/{base_name}_thumb_md.jpg"
 
 def cleanup_thumbnails(clip_id: int) -> None:
@@ -72,28 +60,47 @@ def cleanup_thumbnails(clip_id: int) -> None:
         variant_path = THUMBNAIL_DIR / f"{base_name}_thumb_{label}.jpg"
         if variant_path.exists():
             os.remove(variant_path)
+
+
+def copy_thumbnails(source_clip_id: int, clip_id: int) -> str | None:
+    """Reuse another clip's thumbnails (hard links where possible) instead of running ffmpeg again."""
+    for label in THUMBNAIL_SIZES:
+        source_path = THUMBNAIL_DIR / f"{source_clip_id}_thumb_{label}.jpg"
+        variant_path = THUMBNAIL_DIR / f"{clip_id}_thumb_{label}.jpg"
+        if not source_path.exists():
+            cleanup_thumbnails(clip_id)
+            return None
+        try:
+            os.link(source_path, variant_path)
+        except OSError:
+            shutil.copyfile(source_path, variant_path)
     
-    raw_frame_path = THUMBNAIL_DIR / f"{base_name}_raw.jpg"
-    if raw_frame_path.exists():
-        os.remove(raw_frame_path)
+    return f"uploads/thumbnails/{clip_id}_thumb_md.jpg"
 
-def process_and_store_thumbnail(clip_id: int, video_path: str, notify_discord: bool) -> None:
-    from database import get_db
+def process_and_store_thumbnail(clip_id: int, video_path: str, notify_discord: bool = False, duration: float | None = None) -> None:
+    """Job handler for "thumbnail" jobs; raising makes the worker retry with backoff."""
+    from database import SessionLocal
     from models import Clip
     
-    thumbnail_path = generate_thumbnails(video_path, clip_id)
-    if not thumbnail_path:
-        print(f"Thumbnail generation failed for clip {clip_id}")
+    if not os.path.exists(video_path):
+        print(f"Skipping thumbnails for clip {clip_id}: {video_path} no longer exists")
         return
     
-    db_session = next(get_db())
+    thumbnail_path = generate_thumbnails(video_path, clip_id, duration)
+    if not thumbnail_path:
+        raise RuntimeError(f"Thumbnail generation failed for clip {clip_id}")
+    
+    db_session = SessionLocal()
     try:
         clip = db_session.query(Clip).filter(Clip.id == clip_id).first()
-        if clip:
-            clip.thumbnail_path = thumbnail_path
-            db_session.commit() 
+        if not clip:
+            cleanup_thumbnails(clip_id)
+            return
+        
+        clip.thumbnail_path = thumbnail_path
+        db_session.commit() 
         
-        if notify_discord and clip:
+        if notify_discord:
             send_discord_notification(clip)
     finally:
         db_session.close()
\ No newline at end of file
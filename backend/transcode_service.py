@@ -0,0 +1,201 @@
+from pathlib import Path
+from uuid import uuid4
+import ffmpeg
+import os
+import re
+import shutil
+import struct
+from ingest_service import media_dir, probe_media
+
+# (name, height, video bitrate, audio bitrate)
+HLS_LADDER = [
+    ("360p", 360, 800_000, 96_000),
+    ("720p", 720, 2_800_000, 128_000),
+    ("1080p", 1080, 5_000_000, 160_000),
+]
+HLS_SEGMENT_SECONDS = 4
+HLS_MASTER_PLAYLIST = "master.m3u8"
+HLS_FILE_PATTERN = re.compile(r"^(master\.m3u8|\d+p/(index\.m3u8|seg_\d{3,}\.ts))$")
+
+def top_level_boxes(video_path: str) -> list[bytes]:
+    """Walk the top-level MP4 boxes by reading only their headers."""
+    boxes = []
+    file_size = os.path.getsize(video_path)
+    with open(video_path, "rb") as f:
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            size, box_type = struct.unpack(">I4s", f.read(8))
+            if size == 1:
+                size = struct.unpack(">Q", f.read(8))[0]
+            elif size == 0:
+                size = file_size - offset
+            if size < 8:
+                break
+            boxes.append(box_type)
+            offset += size
+    return boxes
+
+def needs_faststart(video_path: str) -> bool:
+    """True when the moov atom comes after the media data, so players must fetch the tail first."""
+    if not video_path.lower().endswith(".mp4"):
+        return False
+    boxes = top_level_boxes(video_path)
+    if b"moov" not in boxes or b"mdat" not in boxes:
+        return False
+    return boxes.index(b"moov") > boxes.index(b"mdat")
+
+def remux_faststart(video_path: str) -> None:
+    """Lossless stream copy with the moov atom moved to the front, swapped in place of the original."""
+    temp_path = f"{video_path}.faststart-{uuid4().hex}.mp4"
+    try:
+        (
+            ffmpeg.input(video_path)
+            .output(temp_path, c="copy", map=0, movflags="+faststart")
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+        os.replace(temp_path, video_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def process_faststart(clip_id: int, video_path: str) -> None:
+    """
+    Job handler for "faststart" jobs. The blob keeps its content-hash path (the hash identifies
+    the uploaded bytes), so later re-uploads still find the remuxed file.
+    """
+    from database import SessionLocal
+    from models import Clip
+
+    if not os.path.exists(video_path):
+        print(f"Skipping faststart for clip {clip_id}: {video_path} no longer exists")
+        return
+
+    db = SessionLocal()
+    try:
+        if needs_faststart(video_path):
+            try:
+                remux_faststart(video_path)
+            except ffmpeg.Error as e:
+                raise RuntimeError(f"Faststart remux failed for clip {clip_id}: {e.stderr.decode()}")
+            print(f"Remuxed {video_path} for faststart")
+        elif not db.query(Clip).filter(Clip.file_path == video_path, Clip.faststart_remuxed == True).first():
+            return
+
+        db.query(Clip).filter(Clip.file_path == video_path).update({
+            Clip.faststart_remuxed: True,
+            Clip.file_size: os.path.getsize(video_path)
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def hls_dir(video_path: str) -> Path:
+    return media_dir(video_path) / "hls"
+
+def hls_file_path(video_path: str, name: str) -> Path | None:
+    """Resolve a file requested from the HLS endpoint, refusing anything outside the rendition layout."""
+    if not HLS_FILE_PATTERN.match(name):
+        return None
+    return hls_dir(video_path) / name
+
+def hls_media_type(name: str) -> str:
+    return "application/vnd.apple.mpegurl" if name.endswith(".m3u8") else "video/mp2t"
+
+def select_renditions(source_height: int) -> list[tuple[str, int, int, int]]:
+    """Rungs at or below the source height; a source smaller than the lowest rung keeps its own height."""
+    renditions = [rung for rung in HLS_LADDER if rung[1] <= source_height]
+    if not renditions:
+        name, _, video_bitrate, audio_bitrate = HLS_LADDER[0]
+        even_height = max(2, source_height - source_height % 2)
+        renditions = [(f"{even_height}p", even_height, video_bitrate, audio_bitrate)]
+    return renditions
+
+def transcode_rendition(video_path: str, output_dir: Path, height: int, video_bitrate: int, audio_bitrate: int) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (
+        ffmpeg.input(video_path)
+        .output(
+            str(output_dir / "index.m3u8"),
+            vf=f"scale=-2:{height}",
+            vcodec="libx264",
+            preset="veryfast",
+            pix_fmt="yuv420p",
+            sc_threshold=0,
+            force_key_frames=f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+            maxrate=video_bitrate,
+            bufsize=video_bitrate * 2,
+            acodec="aac",
+            ac=2,
+            f="hls",
+            hls_time=HLS_SEGMENT_SECONDS,
+            hls_playlist_type="vod",
+            hls_segment_filename=str(output_dir / "seg_%03d.ts"),
+            **{"b:v": video_bitrate, "b:a": audio_bitrate}
+        )
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+
+def write_master_playlist(output_dir: Path, renditions: list[tuple[str, int, int, int]], width: int, height: int) -> None:
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for name, rendition_height, video_bitrate, audio_bitrate in renditions:
+        rendition_width = round(width * rendition_height / height / 2) * 2
+        bandwidth = int((video_bitrate + audio_bitrate) * 1.1)
+        lines.append(f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={rendition_width}x{rendition_height}")
+        lines.append(f"{name}/index.m3u8")
+    (output_dir / HLS_MASTER_PLAYLIST).write_text("\n".join(lines) + "\n")
+
+def generate_hls(video_path: str, width: int | None = None, height: int | None = None) -> bool:
+    """Build the HLS ladder next to the blob. Renditions are written to a scratch directory and
+    swapped in at the end, so a half-finished ladder is never served."""
+    target_dir = hls_dir(video_path)
+    if (target_dir / HLS_MASTER_PLAYLIST).exists():
+        return True
+
+    if not width or not height:
+        # Only clips ingested before dimensions were stored get here
+        metadata = probe_media(video_path)
+        width, height = metadata["width"], metadata["height"]
+        if not width or not height:
+            print(f"Could not probe {video_path} for transcoding")
+            return False
+
+    renditions = select_renditions(height)
+    work_dir = target_dir.parent / f"hls.tmp-{uuid4().hex}"
+
+    try:
+        for name, rendition_height, video_bitrate, audio_bitrate in renditions:
+            transcode_rendition(video_path, work_dir / name, rendition_height, video_bitrate, audio_bitrate)
+        write_master_playlist(work_dir, renditions, width, height)
+
+        if target_dir.exists():
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            os.replace(work_dir, target_dir)
+        return True
+    except ffmpeg.Error as e:
+        print(f"ffmpeg error transcoding {video_path}: {e.stderr.decode()}")
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return False
+
+def process_and_store_hls(clip_id: int, video_path: str, width: int | None = None, height: int | None = None) -> None:
+    """Job handler for "transcode_hls" jobs."""
+    from database import SessionLocal
+    from models import Clip
+
+    if not os.path.exists(video_path):
+        print(f"Skipping HLS for clip {clip_id}: {video_path} no longer exists")
+        return
+
+    if not generate_hls(video_path, width, height):
+        raise RuntimeError(f"HLS transcoding failed for clip {clip_id}")
+
+    db = SessionLocal()
+    try:
+        # Every clip sharing this blob shares the renditions
+        db.query(Clip).filter(Clip.file_path == video_path).update({Clip.hls_ready: True}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
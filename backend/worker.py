@@ -0,0 +1,135 @@
+"""
+Media processing worker. Runs separately from the API:
+
+    python worker.py
+
+Jobs are claimed from the jobs table and executed in a process pool sized to the CPU count
+(WORKER_PROCESSES overrides it), so ffmpeg work never competes with request handling.
+"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+import os
+import signal
+import socket
+import time
+
+from database import SessionLocal, engine
+from models import Job
+from migrations import run_migrations
+from job_queue import claim_next_job, complete_job, fail_job, requeue_stale_jobs
+from thumbnail_service import process_and_store_thumbnail
+from transcode_service import process_and_store_hls, process_faststart
+from storyboard_service import process_and_store_storyboard
+from discord_utils import notify_clip_uploaded
+from ingest_service import process_media_metadata, reconcile_file_states
+
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "0")) or os.cpu_count() or 1
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+STALE_JOB_CHECK_INTERVAL = 60
+FILE_RECONCILE_INTERVAL = int(os.getenv("FILE_RECONCILE_INTERVAL", "3600"))
+
+JOB_HANDLERS = {
+    "thumbnail": process_and_store_thumbnail,
+    "transcode_hls": process_and_store_hls,
+    "faststart": process_faststart,
+    "storyboard": process_and_store_storyboard,
+    "discord_notification": notify_clip_uploaded,
+    "metadata": process_media_metadata,
+}
+
+def init_process() -> None:
+    # Connections inherited from the parent must not be shared with the child
+    engine.dispose(close=False)
+    # Ctrl+C is handled by the parent, which lets running jobs finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def run_job(kind: str, clip_id: int | None, payload: dict) -> None:
+    handler = JOB_HANDLERS.get(kind)
+    if handler is None:
+        raise ValueError(f"Unknown job kind: {kind}")
+    handler(clip_id, **payload)
+
+def heartbeat(db, job_ids) -> None:
+    if not job_ids:
+        return
+    db.query(Job).filter(Job.id.in_(job_ids)).update(
+        {Job.locked_at: datetime.now(timezone.utc)}, synchronize_session=False
+    )
+    db.commit()
+
+def main() -> None:
+    run_migrations(engine)
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        print("Worker stopping, waiting for running jobs to finish...")
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    print(f"Worker {worker_id} started with {WORKER_PROCESSES} process(es)")
+
+    db = SessionLocal()
+    pool = ProcessPoolExecutor(max_workers=WORKER_PROCESSES, initializer=init_process)
+    in_flight = {}
+    last_stale_check = 0.0
+    last_reconcile = 0.0
+
+    try:
+        while not stopping or in_flight:
+            if time.monotonic() - last_stale_check > STALE_JOB_CHECK_INTERVAL:
+                requeued = requeue_stale_jobs(db)
+                if requeued:
+                    print(f"Requeued {requeued} stale job(s)")
+                heartbeat(db, list(in_flight.values()))
+                last_stale_check = time.monotonic()
+
+            if FILE_RECONCILE_INTERVAL and time.monotonic() - last_reconcile > FILE_RECONCILE_INTERVAL:
+                missing, restored = reconcile_file_states(db)
+                if missing or restored:
+                    print(f"Storage reconcile: {missing} blob(s) missing, {restored} restored")
+                last_reconcile = time.monotonic()
+
+            while not stopping and len(in_flight) < WORKER_PROCESSES:
+                job = claim_next_job(db, worker_id)
+                if not job:
+                    break
+                print(f"Running job {job.id} ({job.kind}) attempt {job.attempts}/{job.max_attempts}")
+                future = pool.submit(run_job, job.kind, job.clip_id, dict(job.payload or {}))
+                in_flight[future] = job.id
+
+            if not in_flight:
+                time.sleep(JOB_POLL_INTERVAL)
+                continue
+
+            done, _ = wait(in_flight, timeout=JOB_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            pool_broken = False
+            for future in done:
+                job_id = in_flight.pop(future)
+                try:
+                    future.result()
+                    complete_job(db, job_id)
+                except BrokenProcessPool as e:
+                    pool_broken = True
+                    fail_job(db, job_id, f"Worker process died: {e}")
+                except Exception as e:
+                    fail_job(db, job_id, f"{type(e).__name__}: {e}")
+
+            if pool_broken:
+                for future, job_id in list(in_flight.items()):
+                    fail_job(db, job_id, "Worker process pool was restarted")
+                in_flight.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=WORKER_PROCESSES, initializer=init_process)
+    finally:
+        pool.shutdown(wait=True)
+        db.close()
+        print(f"Worker {worker_id} stopped")
+
+if __name__ == "__main__":
+    main()
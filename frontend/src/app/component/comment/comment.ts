@@ -1,10 +1,11 @@
 import { Component, EventEmitter, inject, Input, OnInit, Output, signal } from '@angular/core';
-import { CommentResponse, CommentCreate } from '../../models/comment.model';
+import { CommentResponse, CommentCreate, updateComment } from '../../models/comment.model';
 import { AuthService } from '../../services/auth';
 import { FormsModule } from '@angular/forms';
 import { CommentService } from '../../services/comment';
 import { ProfileService } from '../../services/profile';
 import { ProfilePicture } from '../profile-picutre/profile-picture';
+import { SnackbarService } from '../../services/snackbar';
 
 @Component({
   selector: 'app-comment',
@@ -17,13 +18,13 @@ export class Comment implements OnInit {
 
   @Output() delete = new EventEmitter<number>();
   @Output() edit = new EventEmitter<CommentResponse>();
-  @Output() reply = new EventEmitter<CommentCreate>();
   @Output() like = new EventEmitter<number>();
   @Output() dislike = new EventEmitter<number>();
 
   authService: AuthService = inject(AuthService);
   commentsService: CommentService = inject(CommentService);
   profileService: ProfileService = inject(ProfileService);
+  snackbarService: SnackbarService = inject(SnackbarService);
 
   isEditing = signal<boolean>(false);
   isSubmitting = signal<boolean>(false);
@@ -35,6 +36,10 @@ export class Comment implements OnInit {
 
   showReplies = signal<boolean>(false);
   replies = signal<CommentResponse[]>([]);
+  repliesLoaded = signal<boolean>(false);
+  repliesCursor = signal<string | null>(null);
+  isLoadingReplies = signal<boolean>(false);
+  replyCount = signal<number>(0);
 
   profilePicUrl = signal<string | null>(null);
 
@@ -42,6 +47,7 @@ export class Comment implements OnInit {
     this.userHasLiked.set(this.comment.user_has_liked);
     this.userHasDisliked.set(this.comment.user_has_disliked);
     this.commentMessage.set(this.comment.message);
+    this.replyCount.set(this.comment.reply_count);
 
     this.profileService.getUserProfilePicture(this.comment.commenter_id).subscribe({
       next: (res) => this.profilePicUrl.set(res.profile_picture_url),
@@ -66,15 +72,37 @@ export class Comment implements OnInit {
   }
 
   toggleReplies() {
-    if (!this.showReplies() && this.replies().length === 0) {
+    if (!this.showReplies() && !this.repliesLoaded()) {
       this.loadReplies();
     }
     this.showReplies.set(!this.showReplies());
   }
 
   loadReplies() {
-    this.commentsService.getCommentsByVideoId(this.comment.video_id).subscribe((comments) => {
-      this.replies.set(comments.filter((c) => c.parent_comment_id === this.comment.id));
+    this.commentsService.getReplies(this.comment.id).subscribe((page) => {
+      this.replies.set(page.items);
+      this.repliesCursor.set(page.nextCursor);
+      this.repliesLoaded.set(true);
+    });
+  }
+
+  loadMoreReplies() {
+    const cursor = this.repliesCursor();
+    if (!cursor || this.isLoadingReplies()) {
+      return;
+    }
+
+    this.isLoadingReplies.set(true);
+    this.commentsService.getReplies(this.comment.id, cursor).subscribe({
+      next: (page) => {
+        this.replies.update((replies) => [...replies, ...page.items]);
+        this.repliesCursor.set(page.nextCursor);
+        this.isLoadingReplies.set(false);
+      },
+      error: (err) => {
+        console.error('Error loading replies:', err);
+        this.isLoadingReplies.set(false);
+      }
     });
   }
 
@@ -127,54 +155,63 @@ export class Comment implements OnInit {
       parent_comment_id: this.comment.id,
     };
 
-    this.reply.emit(newReply);
-    this.isSubmitting.set(false);
-    this.replyMessage.set('');
-    this.showReplyForm.set(false);
+    this.commentsService.createComment(newReply).subscribe({
+      next: (reply) => {
+        this.replyCount.update((count) => count + 1);
+        // Oldest first: the new reply ends a fully loaded thread, or comes with its last page
+        if (!this.repliesLoaded()) {
+          this.loadReplies();
+        } else if (!this.repliesCursor()) {
+          this.replies.update((replies) => [...replies, reply]);
+        }
+        this.showReplies.set(true);
+        this.isSubmitting.set(false);
+        this.replyMessage.set('');
+        this.showReplyForm.set(false);
+        this.snackbarService.show('Reply posted successfully!', 'success', 3000);
+      },
+      error: (err) => {
+        console.error('Error posting reply:', err);
+        this.isSubmitting.set(false);
+        this.snackbarService.show('Error posting reply', 'error', 3000);
+      }
+    });
   }
 
   handleReplyLike(commentId: number) {
-    this.like.emit(commentId);
-    setTimeout(() => {
-      if (this.showReplies()) {
-        this.loadReplies();
+    this.commentsService.likeComment(commentId).subscribe({
+      next: (votes) => this.replies.update((replies) => updateComment(replies, commentId, votes)),
+      error: (err) => {
+        this.snackbarService.show('There was an error liking the comment!', 'error', 3000);
+        console.error(err);
       }
-    }, 50);
+    });
   }
 
   handleReplyDislike(commentId: number) {
-    this.dislike.emit(commentId);
-    setTimeout(() => {
-      if (this.showReplies()) {
-        this.loadReplies();
+    this.commentsService.dislikeComment(commentId).subscribe({
+      next: (votes) => this.replies.update((replies) => updateComment(replies, commentId, votes)),
+      error: (err) => {
+        this.snackbarService.show('There was an error disliking the comment!', 'error', 3000);
+        console.error(err);
       }
-    }, 50);
-  }
-
-  handleReplyCreate(newReply: CommentCreate) {
-    this.reply.emit(newReply);
-    setTimeout(() => {
-      if (this.showReplies()) {
-        this.loadReplies();
-      }
-    }, 200);
+    });
   }
 
   handleReplyEdit(editedComment: CommentResponse) {
-    this.edit.emit(editedComment);
-    setTimeout(() => {
-      if (this.showReplies()) {
-        this.loadReplies();
-      }
-    }, 200);
+    this.commentsService.updateComment(editedComment.id, { message: editedComment.message }).subscribe({
+      next: (updated) => {
+        this.replies.update((replies) => updateComment(replies, editedComment.id, updated));
+        this.snackbarService.show('Comment was updated successfully!', 'success', 3000);
+      },
+      error: () => this.snackbarService.show('There was an error updating comment!', 'error', 3000)
+    });
   }
 
   handleReplyDelete(commentId: number) {
-    this.delete.emit(commentId);
-    setTimeout(() => {
-      if (this.showReplies()) {
-        this.loadReplies();
-      }
-    }, 200);
+    this.commentsService.deleteComment(commentId).subscribe(() => {
+      this.replies.update((replies) => replies.filter((reply) => reply.id !== commentId));
+      this.replyCount.update((count) => Math.max(0, count - 1));
+    });
   }
 }
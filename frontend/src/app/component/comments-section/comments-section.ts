@@ -1,5 +1,5 @@
 import { Component, inject, Input, OnInit, signal } from '@angular/core';
-import { CommentResponse, CommentCreate, CommentUpdate} from '../../models/comment.model';
+import { CommentResponse, CommentCreate, updateComment } from '../../models/comment.model';
 import { CommentService } from '../../services/comment';
 import { Comment } from '../comment/comment';
 import { FormsModule } from '@angular/forms';
@@ -19,7 +19,8 @@ export class CommentsSection implements OnInit {
   @Input() clipId!: number;
 
   comments = signal<CommentResponse[]>([]);
-  replies = signal<CommentResponse[]>([]);
+  nextCursor = signal<string | null>(null);
+  isLoadingMore = signal<boolean>(false);
   commentMessage = signal<string>('');
   isSubmitting = signal<boolean>(false);
 
@@ -32,14 +33,35 @@ export class CommentsSection implements OnInit {
   }
 
   loadComments() {
-    this.commentsService.getCommentsByVideoId(this.clipId).subscribe(comments => {
-      this.comments.set(comments.filter((comment) => !comment.parent_comment_id));
+    this.commentsService.getComments(this.clipId).subscribe(page => {
+      this.comments.set(page.items);
+      this.nextCursor.set(page.nextCursor);
     });
   };
 
+  loadMoreComments() {
+    const cursor = this.nextCursor();
+    if (!cursor || this.isLoadingMore()) {
+      return;
+    }
+
+    this.isLoadingMore.set(true);
+    this.commentsService.getComments(this.clipId, cursor).subscribe({
+      next: (page) => {
+        this.comments.update((comments) => [...comments, ...page.items]);
+        this.nextCursor.set(page.nextCursor);
+        this.isLoadingMore.set(false);
+      },
+      error: (err) => {
+        console.error('Error loading comments:', err);
+        this.isLoadingMore.set(false);
+      }
+    });
+  }
+
   handleDelete(commentId: number) {
     this.commentsService.deleteComment(commentId).subscribe(() => {
-      this.loadComments();
+      this.comments.update((comments) => comments.filter((comment) => comment.id !== commentId));
     });
   };
 
@@ -61,7 +83,8 @@ export class CommentsSection implements OnInit {
     this.commentsService.createComment(newComment).subscribe({
       next: (res) => {
         this.commentMessage.set('');
-        this.loadComments();
+        // Newest first, so it goes on top without reloading the pages already shown
+        this.comments.update((comments) => [res, ...comments]);
         this.isSubmitting.set(false);
         this.snackbarService.show('Comment saved successfully...', 'success', 3000);
       },
@@ -75,8 +98,8 @@ export class CommentsSection implements OnInit {
 
   handleLike(commentId: number) {
     this.commentsService.likeComment(commentId).subscribe({
-      next: (res) => {
-        this.loadComments();
+      next: (votes) => {
+        this.comments.update((comments) => updateComment(comments, commentId, votes));
       },
       error: (err) => {
         this.snackbarService.show('There was an error liking the comment!', 'error', 3000);
@@ -87,8 +110,8 @@ export class CommentsSection implements OnInit {
 
   handleDislike(commentId: number) {
     this.commentsService.dislikeComment(commentId).subscribe({
-      next: () => {
-        this.loadComments();
+      next: (votes) => {
+        this.comments.update((comments) => updateComment(comments, commentId, votes));
       },
       error: (err) => {
         this.snackbarService.show('There was an error disliking the comment!', 'error', 3000);
@@ -100,8 +123,8 @@ export class CommentsSection implements OnInit {
   handleEdit(comment: CommentResponse) {
     
     this.commentsService.updateComment(comment.id, { "message": comment.message }).subscribe({
-      next: () => {
-        this.loadComments();
+      next: (updated) => {
+        this.comments.update((comments) => updateComment(comments, comment.id, updated));
         this.snackbarService.show('Comment was updated successfully!', 'success', 3000);
       },
       error: (err) => {
@@ -109,17 +132,4 @@ export class CommentsSection implements OnInit {
       }
     })
   }
-
-  handleReply(reply: CommentCreate) {
-    this.commentsService.createComment(reply).subscribe({
-      next: () => {
-        this.loadComments();
-        this.snackbarService.show('Reply posted successfully!', 'success', 3000);
-      },
-      error: (err) => {
-        console.error('Error posting reply:', err);
-        this.snackbarService.show('Error posting reply', 'error', 3000);
-      } 
-    });
-  }
 }
@@ -13,6 +13,7 @@ import { AfterViewInit } from '@angular/core';
 })
 export class VideoPlayer implements AfterViewInit {
   @Input() clipId!: number;
+  @Input() playbackUrl: string | null = null;
   @Input() autoplay: boolean = false;
   @Input() controls: boolean = true;
 
@@ -31,6 +32,10 @@ export class VideoPlayer implements AfterViewInit {
   }
 
   get videoUrl(): string {
+    // The signed URL skips the per-request login and clip lookups and can be cached by proxies
+    if (this.playbackUrl) {
+      return this.clipService.getPlaybackUrl(this.playbackUrl);
+    }
     return this.clipService.getVideoUrl(this.clipId);
   }
 
@@ -13,6 +13,8 @@ export interface Clip {
     likes: number;
     user_has_liked: boolean
     private: boolean
+    // Signed, cacheable video URL; null when the viewer may not play the clip
+    playback_url: string | null
 }
 
 export interface ClipUploadRequest {
@@ -23,4 +23,16 @@ export interface CommentCreate {
 
 export interface CommentUpdate {
     message: string;
-}
\ No newline at end of file
+}
+
+export interface CommentVotes {
+    likes: number;
+    dislikes: number;
+    user_has_liked: boolean;
+    user_has_disliked: boolean;
+}
+
+// A copy of comments with the one matching id updated, so signals holding the list see a change
+export function updateComment(comments: CommentResponse[], id: number, changes: Partial<CommentResponse>): CommentResponse[] {
+    return comments.map((comment) => (comment.id === id ? { ...comment, ...changes } : comment));
+}
@@ -36,6 +36,8 @@ export class Profile implements OnInit, OnDestroy {
   lastUpload = signal<Date | null>(null);
 
   clips = signal<Clip[]>([]);
+  nextCursor = signal<string | null>(null);
+  isLoadingMore = signal<boolean>(false);
 
   sortOption: string = 'newest';
 
@@ -61,6 +63,7 @@ export class Profile implements OnInit, OnDestroy {
         tap(() => {
           this.user.set(null);
           this.clips.set([]);
+          this.nextCursor.set(null);
           this.notFound.set(false);
           this.isLoading.set(true);
         }),
@@ -75,13 +78,8 @@ export class Profile implements OnInit, OnDestroy {
         switchMap((user) => this.clipService.getClipsByUserId(user.id)),
       )
       .subscribe({
-        next: (clips) => {
-          this.clips.set(clips);
-          this.totalClips.set(this.getTotalClips(this.clips()));
-          this.totalDuration.set(this.getWatchTime(this.clips()));
-          const recentClip = this.getRecentDate(this.clips());
-          this.lastUpload.set(recentClip ? new Date(recentClip.uploaded_at) : null);
-
+        next: (page) => {
+          this.addClips(page.items, page.nextCursor);
           this.isLoading.set(false);
         },
         error: (e) => {
@@ -102,6 +100,36 @@ export class Profile implements OnInit, OnDestroy {
     this.sortByNewest();
   }
 
+  loadMoreClips() {
+    const user = this.user();
+    const cursor = this.nextCursor();
+    if (!user || !cursor || this.isLoadingMore()) return;
+
+    this.isLoadingMore.set(true);
+    this.clipService.getClipsByUserId(user.id, cursor).subscribe({
+      next: (page) => {
+        this.addClips(page.items, page.nextCursor);
+        this.isLoadingMore.set(false);
+      },
+      error: () => {
+        this.isLoadingMore.set(false);
+        this.snackbarService.show('There was an error loading more clips.', 'error', 3000);
+      },
+    });
+  }
+
+  // Stats cover the pages loaded so far; the first page holds the newest clip
+  private addClips(clips: Clip[], nextCursor: string | null) {
+    this.clips.set([...this.clips(), ...clips]);
+    this.nextCursor.set(nextCursor);
+    this.sortByValue();
+
+    this.totalClips.set(this.getTotalClips(this.clips()));
+    this.totalDuration.set(this.getWatchTime(this.clips()));
+    const recentClip = this.getRecentDate(this.clips());
+    this.lastUpload.set(recentClip ? new Date(recentClip.uploaded_at) : null);
+  }
+
   getTotalClips(clips: Clip[]) {
     return clips.length;
   }
@@ -172,6 +200,7 @@ export class Profile implements OnInit, OnDestroy {
         next: () => {
           this.clips.set(this.clips().filter((clip) => clip.id != clipId));
           this.totalClips.set(this.getTotalClips(this.clips()));
+          this.totalDuration.set(this.getWatchTime(this.clips()));
           const recentClip = this.getRecentDate(this.clips());
           this.lastUpload.set(recentClip ? new Date(recentClip.uploaded_at) : null);
 
@@ -1,8 +1,9 @@
-import { HttpClient, HttpEvent } from '@angular/common/http';
+import { HttpClient, HttpEvent, HttpParams } from '@angular/common/http';
 import { inject, Injectable } from '@angular/core';
 import { environment } from '../../environments/environment.development';
 import { Clip, ClipLikeResponse, ClipUpdate } from '../models/clip.model';
-import { Observable } from 'rxjs';
+import { Page } from '../models/page.model';
+import { Observable, map } from 'rxjs';
 
 @Injectable({
   providedIn: 'root',
@@ -11,16 +12,26 @@ export class ClipService {
   httpClient = inject(HttpClient);
   apiUrl = environment.apiUrl;
 
-  getClipsByUserId(userId: number): Observable<Clip[]> {
-    return this.httpClient.get<Clip[]>(`${this.apiUrl}/api/clips`, { params: { user_id: userId } });
+  // Newest first; pass the previous page's nextCursor to load the one after it
+  getClipsByUserId(userId: number, cursor: string | null = null): Observable<Page<Clip>> {
+    let params = new HttpParams().set('user_id', userId);
+    if (cursor) {
+      params = params.set('cursor', cursor);
+    }
+    return this.httpClient.get<Clip[]>(`${this.apiUrl}/api/clips`, { params, observe: 'response' }).pipe(
+      map((response) => ({
+        items: response.body ?? [],
+        nextCursor: response.headers.get('X-Next-Cursor'),
+      }))
+    );
   }
 
   getVideoUrl(clipId: number): string {
     return `${this.apiUrl}/api/clips/${clipId}/video`;
   }
 
-  getAllClips(): Observable<Clip[]> {
-    return this.httpClient.get<Clip[]>(`${this.apiUrl}/api/clips`);
+  getPlaybackUrl(playbackUrl: string): string {
+    return `${this.apiUrl}${playbackUrl}`;
   }
 
   uploadClip(file: File, title: string, description?: string, postToDiscord?: boolean): Observable<HttpEvent<Clip>> {
@@ -1,8 +1,11 @@
 import { Injectable, inject } from '@angular/core';
-import { HttpClient } from '@angular/common/http';
+import { HttpClient, HttpParams } from '@angular/common/http';
 import { environment } from '../../environments/environment.development';
-import { CommentCreate, CommentResponse, CommentUpdate } from '../models/comment.model';
-import { Observable } from 'rxjs';
+import { CommentCreate, CommentResponse, CommentUpdate, CommentVotes } from '../models/comment.model';
+import { Page } from '../models/page.model';
+import { Observable, map } from 'rxjs';
+
+const COMMENT_PAGE_SIZE = 20;
 
 @Injectable({
   providedIn: 'root',
@@ -11,10 +14,27 @@ export class CommentService {
   httpClient = inject(HttpClient);
   apiUrl = environment.apiUrl;
 
-  getCommentsByVideoId(id: number, include_deleted: boolean = false): Observable<CommentResponse[]> {
-    return this.httpClient.get<CommentResponse[]>(`${this.apiUrl}/api/clips/${id}/comments`, {
-      params: { include_deleted: include_deleted },
-    });
+  // Newest top-level comments first; replies are fetched per thread
+  getComments(clipId: number, cursor: string | null = null): Observable<Page<CommentResponse>> {
+    return this.getPage(`${this.apiUrl}/api/clips/${clipId}/comments`, cursor);
+  }
+
+  // Oldest first, so a thread reads top to bottom
+  getReplies(commentId: number, cursor: string | null = null): Observable<Page<CommentResponse>> {
+    return this.getPage(`${this.apiUrl}/api/comments/${commentId}/replies`, cursor);
+  }
+
+  private getPage(url: string, cursor: string | null): Observable<Page<CommentResponse>> {
+    let params = new HttpParams().set('limit', COMMENT_PAGE_SIZE);
+    if (cursor) {
+      params = params.set('cursor', cursor);
+    }
+    return this.httpClient.get<CommentResponse[]>(url, { params, observe: 'response' }).pipe(
+      map((response) => ({
+        items: response.body ?? [],
+        nextCursor: response.headers.get('X-Next-Cursor'),
+      }))
+    );
   }
 
   createComment(commentData: CommentCreate): Observable<CommentResponse> {
@@ -29,11 +49,11 @@ export class CommentService {
     return this.httpClient.put<CommentResponse>(`${this.apiUrl}/api/comments/${commentId}`, commentData)
   }
 
-  likeComment(commentId: number): Observable<any> {
-    return this.httpClient.post(`${this.apiUrl}/api/comments/${commentId}/like`, {});
+  likeComment(commentId: number): Observable<CommentVotes> {
+    return this.httpClient.post<CommentVotes>(`${this.apiUrl}/api/comments/${commentId}/like`, {});
   }
 
-  dislikeComment(commentId: number): Observable<any> {
-    return this.httpClient.post(`${this.apiUrl}/api/comments/${commentId}/dislike`, {});
+  dislikeComment(commentId: number): Observable<CommentVotes> {
+    return this.httpClient.post<CommentVotes>(`${this.apiUrl}/api/comments/${commentId}/dislike`, {});
   }
 }